@@ -6,11 +6,19 @@ from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import tempfile
 import os
+import asyncio
 from typing import Optional, Dict, Any
 from datetime import datetime
+import logging
 
 # Import the separated transcription service
-from transcription_service import TranscriptionService
+from transcription_service import get_service
+
+# Configure logging
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
 
 app = FastAPI(
     title="Direct Transcription API",
@@ -28,7 +36,12 @@ app.add_middleware(
 )
 
 # Initialize transcription service
-transcription_service = TranscriptionService()
+transcription_service = get_service()
+
+@app.on_event("startup")
+async def load_model():
+    """Load the model off the event loop before the server accepts requests"""
+    await asyncio.to_thread(lambda: transcription_service.model)
 
 @app.post("/transcribe/", 
           summary="Direct transcribe audio file",
@@ -7,6 +7,7 @@ import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
 import shutil
+import logging
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.responses import JSONResponse
@@ -19,6 +20,12 @@ from queue_processor import (
     task_queue, websocket_manager
 )
 
+# Configure logging
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
 # FastAPI app
 app = FastAPI(
     title="Queue-based Transcription API",
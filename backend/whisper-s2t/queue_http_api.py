@@ -5,7 +5,7 @@ Provides REST API endpoints for queue management
 """
 import asyncio
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 import logging
 
@@ -80,8 +80,14 @@ async def startup_event():
     """Initialize queue service on startup"""
     global queue_service
     queue_service = StandaloneQueueService()
+    await queue_service.start()
     logger.info("Queue HTTP API started")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending queue stats on shutdown"""
+    await queue_service.close()
+
 @app.post("/tasks/transcription", response_model=TaskResponse)
 async def submit_transcription_task(
     file: UploadFile = File(...),
@@ -118,8 +124,8 @@ async def submit_transcription_task(
         )
         
         # Add to queue
-        if queue_service.push_task(task):
-            stats = queue_service.get_queue_stats()
+        if await queue_service.push_task(task):
+            stats = await queue_service.get_queue_stats()
             
             return TaskResponse(
                 task_id=task_id,
@@ -154,8 +160,8 @@ async def submit_risk_detection_task(request: RiskDetectionTaskRequest):
         )
         
         # Add to queue
-        if queue_service.push_task(task):
-            stats = queue_service.get_queue_stats()
+        if await queue_service.push_task(task):
+            stats = await queue_service.get_queue_stats()
             
             return TaskResponse(
                 task_id=task_id,
@@ -173,7 +179,7 @@ async def submit_risk_detection_task(request: RiskDetectionTaskRequest):
 @app.get("/tasks/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(task_id: str):
     """Get status of a specific task"""
-    task = queue_service.get_task_status(task_id)
+    task = await queue_service.get_task_status(task_id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -207,12 +213,18 @@ async def list_tasks(
     try:
         if queue_service.redis_client:
             # Get task keys from Redis
-            task_keys = queue_service.redis_client.hkeys("queue_tasks")
-            completed_keys = queue_service.redis_client.hkeys("queue_completed")
+            task_keys = await queue_service.redis_client.hkeys("queue_tasks")
+            completed_keys = await queue_service.redis_client.hkeys("queue_completed")
             all_keys = list(task_keys) + list(completed_keys)
             
             for task_id in all_keys[offset:offset+limit]:
-                task = queue_service.get_task_status(task_id)
+                # Cheap status check before loading the full task
+                if status:
+                    fields = await queue_service.get_task_status_field(task_id, "status")
+                    if fields.get("status") != status:
+                        continue
+                
+                task = await queue_service.get_task_status(task_id)
                 if task:
                     # Apply filters
                     if status and task.status.value != status:
@@ -245,9 +257,9 @@ async def list_tasks(
                     "task_type": task_data.get('task_type', 'transcription'),
                     "status": task_data.get('status', 'unknown'),
                     "progress": task_data.get('progress', 0.0),
-                    "created_at": datetime.fromisoformat(task_data['created_at']),
-                    "started_at": datetime.fromisoformat(task_data['started_at']) if task_data.get('started_at') else None,
-                    "completed_at": datetime.fromisoformat(task_data['completed_at']) if task_data.get('completed_at') else None
+                    "created_at": datetime.fromtimestamp(task_data['created_at'], tz=timezone.utc),
+                    "started_at": datetime.fromtimestamp(task_data['started_at'], tz=timezone.utc) if task_data.get('started_at') else None,
+                    "completed_at": datetime.fromtimestamp(task_data['completed_at'], tz=timezone.utc) if task_data.get('completed_at') else None
                 })
     
     except Exception as e:
@@ -264,7 +276,7 @@ async def list_tasks(
 @app.delete("/tasks/{task_id}")
 async def cancel_task(task_id: str):
     """Cancel a queued task"""
-    task = queue_service.get_task_status(task_id)
+    task = await queue_service.get_task_status(task_id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -273,7 +285,7 @@ async def cancel_task(task_id: str):
         raise HTTPException(status_code=400, detail=f"Cannot cancel task with status: {task.status.value}")
     
     # Update task status to cancelled
-    success = queue_service.update_task_status(
+    success = await queue_service.update_task_status(
         task_id,
         TaskStatus.CANCELLED,
         completed_at=datetime.now(),
@@ -292,13 +304,13 @@ async def cancel_task(task_id: str):
 @app.get("/stats")
 async def get_queue_stats():
     """Get current queue statistics"""
-    stats = queue_service.get_queue_stats()
+    stats = await queue_service.get_queue_stats()
     return stats.dict()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    stats = queue_service.get_queue_stats()
+    stats = await queue_service.get_queue_stats()
     
     return {
         "status": "healthy",
@@ -310,7 +322,7 @@ async def health_check():
 async def force_backup():
     """Force an immediate backup"""
     try:
-        success = queue_service.save_backup()
+        success = await queue_service.save_backup()
         if success:
             return {"message": "Backup completed successfully"}
         else:
@@ -323,7 +335,7 @@ async def force_backup():
 async def cleanup_stuck_tasks():
     """Clean up tasks that have been processing too long"""
     try:
-        queue_service.cleanup_stuck_tasks()
+        await queue_service.cleanup_stuck_tasks()
         return {"message": "Stuck tasks cleanup completed"}
     except Exception as e:
         logger.error(f"Error cleaning up stuck tasks: {e}")
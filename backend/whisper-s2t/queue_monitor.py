@@ -20,9 +20,9 @@ class QueueMonitor:
         self.redis_url = redis_url
         self.queue_service = StandaloneQueueService(redis_url=redis_url)
     
-    def display_stats(self) -> None:
+    async def display_stats(self) -> None:
         """Display current queue statistics"""
-        stats = self.queue_service.get_queue_stats()
+        stats = await self.queue_service.get_queue_stats()
         
         print("\n" + "="*60)
         print(f"QUEUE SERVICE STATISTICS - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -44,7 +44,7 @@ class QueueMonitor:
         
         print("="*60)
     
-    def list_tasks(self, status_filter: Optional[str] = None, limit: int = 10) -> None:
+    async def list_tasks(self, status_filter: Optional[str] = None, limit: int = 10) -> None:
         """List tasks with optional status filter"""
         print(f"\nLIST OF TASKS (limit: {limit})")
         print("-" * 80)
@@ -56,18 +56,18 @@ class QueueMonitor:
         try:
             if self.queue_service.redis_client:
                 # Get all task keys
-                task_keys = self.queue_service.redis_client.hkeys("queue_tasks")
-                completed_keys = self.queue_service.redis_client.hkeys("queue_completed")
+                task_keys = await self.queue_service.redis_client.hkeys("queue_tasks")
+                completed_keys = await self.queue_service.redis_client.hkeys("queue_completed")
                 all_keys = list(task_keys) + list(completed_keys)
                 
                 displayed = 0
                 for task_id in all_keys[:limit]:
-                    task = self.queue_service.get_task_status(task_id)
+                    task = await self.queue_service.get_task_status(task_id)
                     if task:
                         if status_filter and task.status.value != status_filter:
                             continue
                         
-                        created_str = task.created_at.strftime('%m-%d %H:%M:%S')
+                        created_str = task.created_at.astimezone().strftime('%m-%d %H:%M:%S')
                         print(f"{task_id:<36} {task.task_type.value:<15} {task.status.value:<12} {created_str:<20} {task.progress:<7.1%}")
                         displayed += 1
                         
@@ -82,7 +82,7 @@ class QueueMonitor:
                     if status_filter and task_data.get('status') != status_filter:
                         continue
                     
-                    created_at = datetime.fromisoformat(task_data['created_at'])
+                    created_at = datetime.fromtimestamp(task_data['created_at'])
                     created_str = created_at.strftime('%m-%d %H:%M:%S')
                     task_type = task_data.get('task_type', 'transcription')
                     status = task_data.get('status', 'unknown')
@@ -97,9 +97,9 @@ class QueueMonitor:
         except Exception as e:
             print(f"Error listing tasks: {e}")
     
-    def show_task_details(self, task_id: str) -> None:
+    async def show_task_details(self, task_id: str) -> None:
         """Show detailed information about a specific task"""
-        task = self.queue_service.get_task_status(task_id)
+        task = await self.queue_service.get_task_status(task_id)
         
         if not task:
             print(f"Task {task_id} not found")
@@ -109,13 +109,13 @@ class QueueMonitor:
         print("-" * 50)
         print(f"Type: {task.task_type.value}")
         print(f"Status: {task.status.value}")
-        print(f"Created: {task.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Created: {task.created_at.astimezone().strftime('%Y-%m-%d %H:%M:%S')}")
         
         if task.started_at:
-            print(f"Started: {task.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"Started: {task.started_at.astimezone().strftime('%Y-%m-%d %H:%M:%S')}")
         
         if task.completed_at:
-            print(f"Completed: {task.completed_at.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"Completed: {task.completed_at.astimezone().strftime('%Y-%m-%d %H:%M:%S')}")
             duration = task.completed_at - task.created_at
             print(f"Duration: {duration}")
         
@@ -135,9 +135,9 @@ class QueueMonitor:
             print("Result:")
             print(json.dumps(task.result, indent=2))
     
-    def cancel_task(self, task_id: str) -> bool:
+    async def cancel_task(self, task_id: str) -> bool:
         """Cancel a queued task"""
-        task = self.queue_service.get_task_status(task_id)
+        task = await self.queue_service.get_task_status(task_id)
         
         if not task:
             print(f"Task {task_id} not found")
@@ -147,7 +147,7 @@ class QueueMonitor:
             print(f"Cannot cancel task with status: {task.status.value}")
             return False
         
-        success = self.queue_service.update_task_status(
+        success = await self.queue_service.update_task_status(
             task_id,
             TaskStatus.CANCELLED,
             completed_at=datetime.now(),
@@ -161,9 +161,9 @@ class QueueMonitor:
         
         return success
     
-    def retry_failed_task(self, task_id: str) -> bool:
+    async def retry_failed_task(self, task_id: str) -> bool:
         """Retry a failed task"""
-        task = self.queue_service.get_task_status(task_id)
+        task = await self.queue_service.get_task_status(task_id)
         
         if not task:
             print(f"Task {task_id} not found")
@@ -185,7 +185,7 @@ class QueueMonitor:
         task.error_message = None
         task.progress = 0.0
         
-        success = self.queue_service.push_task(task)
+        success = await self.queue_service.push_task(task)
         
         if success:
             print(f"Task {task_id} re-queued for retry ({task.retry_count}/{task.max_retries})")
@@ -194,32 +194,31 @@ class QueueMonitor:
         
         return success
     
-    def clear_completed_tasks(self, older_than_hours: int = 24) -> int:
+    async def clear_completed_tasks(self, older_than_hours: int = 24) -> int:
         """Clear completed tasks older than specified hours"""
-        cutoff_time = datetime.now() - timedelta(hours=older_than_hours)
+        cutoff_time = (datetime.now() - timedelta(hours=older_than_hours)).timestamp()
         cleared_count = 0
         
         try:
             if self.queue_service.redis_client:
                 # Get all completed task keys
-                completed_keys = self.queue_service.redis_client.hkeys("queue_completed")
+                completed_keys = await self.queue_service.redis_client.hkeys("queue_completed")
                 
                 for task_id in completed_keys:
-                    task_data = self.queue_service.redis_client.hget("queue_completed", task_id)
+                    task_data = await self.queue_service.redis_client.hget("queue_completed", task_id)
                     if task_data:
                         task_dict = json.loads(task_data)
                         if task_dict.get('completed_at'):
-                            completed_at = datetime.fromisoformat(task_dict['completed_at'])
-                            if completed_at < cutoff_time:
-                                self.queue_service.redis_client.hdel("queue_completed", task_id)
+                            if task_dict['completed_at'] < cutoff_time:
+                                await self.queue_service.redis_client.hdel("queue_completed", task_id)
+                                await self.queue_service.delete_task_meta(task_id)
                                 cleared_count += 1
             else:
                 # In-memory fallback
                 to_remove = []
                 for task_id, task_data in self.queue_service.memory_completed.items():
                     if task_data.get('completed_at'):
-                        completed_at = datetime.fromisoformat(task_data['completed_at'])
-                        if completed_at < cutoff_time:
+                        if task_data['completed_at'] < cutoff_time:
                             to_remove.append(task_id)
                 
                 for task_id in to_remove:
@@ -233,10 +232,10 @@ class QueueMonitor:
         
         return cleared_count
     
-    def force_backup(self) -> bool:
+    async def force_backup(self) -> bool:
         """Force an immediate backup"""
         print("Forcing backup...")
-        success = self.queue_service.save_backup()
+        success = await self.queue_service.save_backup()
         
         if success:
             print("Backup completed successfully")
@@ -254,7 +253,7 @@ class QueueMonitor:
                 # Clear screen (works on most terminals)
                 print("\033[2J\033[H")
                 
-                self.display_stats()
+                await self.display_stats()
                 print(f"\nRefreshing in {refresh_interval}s... (Ctrl+C to stop)")
                 
                 await asyncio.sleep(refresh_interval)
@@ -306,31 +305,39 @@ def main():
         parser.print_help()
         return
     
+    asyncio.run(run_command(args))
+
+async def run_command(args) -> None:
+    """Run a single CLI command against the queue service"""
     monitor = QueueMonitor(redis_url=args.redis_url)
+    await monitor.queue_service.start()
     
     if args.command == "stats":
-        monitor.display_stats()
+        await monitor.display_stats()
     
     elif args.command == "list":
-        monitor.list_tasks(status_filter=args.status, limit=args.limit)
+        await monitor.list_tasks(status_filter=args.status, limit=args.limit)
     
     elif args.command == "show":
-        monitor.show_task_details(args.task_id)
+        await monitor.show_task_details(args.task_id)
     
     elif args.command == "cancel":
-        monitor.cancel_task(args.task_id)
+        await monitor.cancel_task(args.task_id)
     
     elif args.command == "retry":
-        monitor.retry_failed_task(args.task_id)
+        await monitor.retry_failed_task(args.task_id)
     
     elif args.command == "clear":
-        monitor.clear_completed_tasks(older_than_hours=args.hours)
+        await monitor.clear_completed_tasks(older_than_hours=args.hours)
     
     elif args.command == "backup":
-        monitor.force_backup()
+        await monitor.force_backup()
     
     elif args.command == "watch":
-        asyncio.run(monitor.watch_queue(refresh_interval=args.interval))
+        await monitor.watch_queue(refresh_interval=args.interval)
+    
+    # Write any counter updates made by the command before exiting
+    await monitor.queue_service.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -19,7 +19,7 @@ import signal
 import sys
 
 # Import the separated transcription service
-from transcription_service import TranscriptionService
+from transcription_service import get_service
 
 # Task status enum
 class TaskStatus(str, Enum):
@@ -503,7 +503,7 @@ class TranscriptionProcessor:
     """Handles actual transcription processing using the separated service"""
     
     def __init__(self):
-        self.service = TranscriptionService()
+        self.service = get_service()
     
     async def process_task(self, task: TranscriptionTask, queue: TaskQueue, 
                           websocket_manager: 'WebSocketManager') -> bool:
@@ -678,6 +678,9 @@ async def queue_processor():
     """Background task that continuously processes the queue"""
     print("Queue processor started")
     
+    # Load the model off the event loop, so the first task does not block the API
+    await asyncio.to_thread(lambda: transcription_processor.service.model)
+    
     # Track last backup time
     last_backup_time = datetime.now()
     backup_interval = 300  # 5 minutes
@@ -4,7 +4,6 @@ Standalone Queue Service with Backup and Recovery
 Separates queue management from main transcription service for better observability
 """
 import asyncio
-import json
 import os
 import pickle
 import signal
@@ -16,9 +15,12 @@ from typing import Dict, Any, Optional, List
 from enum import Enum
 import argparse
 import logging
+from contextlib import asynccontextmanager
 
-import redis
+import redis.asyncio as redis
 import aiohttp
+import orjson
+import zstandard as zstd
 from pydantic import BaseModel
 
 # Configure logging
@@ -79,6 +81,72 @@ class QueueStats(BaseModel):
     last_backup: Optional[datetime] = None
     redis_connected: bool = False
 
+def _priority_score(priority: int, timestamp: float) -> float:
+    """Sorted-set score that pops highest priority first, then oldest first.
+    
+    Priority bands are 1e10 apart, which leaves room for sub-millisecond
+    timestamps inside the 53-bit mantissa of a Redis score.
+    """
+    return -priority * 1e10 + timestamp
+
+def _restored_score(score: float, priority: int) -> float:
+    """Queue score of a backed-up (task_id, score) entry under _priority_score.
+    
+    Backups written before it stored priority * 1e6 + timestamp, with higher
+    scores popped first. Reading the score both ways, only one gives a
+    timestamp near the present; the two agree for priority 0.
+    """
+    legacy_timestamp = score - priority * 1e6
+    timestamp = score + priority * 1e10
+    now = time.time()
+    if abs(legacy_timestamp - now) < abs(timestamp - now):
+        return _priority_score(priority, legacy_timestamp)
+    return score
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a task payload; orjson writes bytes that Redis stores as-is"""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _meta_key(task_id: str) -> str:
+    """Redis key of the small per-task hash holding status and progress"""
+    return f"queue_task_meta:{task_id}"
+
+# Frame header that marks a zstd-compressed backup (older backups are plain pickle)
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+def _write_backup(backup_file: str, backup_data: Dict[str, Any]) -> None:
+    """Write compressed backup data to a temp file and atomically swap it into place"""
+    payload = zstd.ZstdCompressor(level=3, threads=-1).compress(pickle.dumps(backup_data))
+    tmp_file = backup_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(payload)
+        # Make sure the data is on disk before it replaces the previous backup
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, backup_file)
+
+def _read_backup(backup_file: str) -> Dict[str, Any]:
+    """Read backup data written by _write_backup or an older uncompressed backup"""
+    with open(backup_file, 'rb') as f:
+        payload = f.read()
+    if payload.startswith(ZSTD_MAGIC):
+        payload = zstd.ZstdDecompressor().decompress(payload)
+    return pickle.loads(payload)
+
+# Task model for each stored task_type
+TASK_MODELS = {
+    TaskType.TRANSCRIPTION: TranscriptionTask,
+    TaskType.RISK_DETECTION: RiskDetectionTask,
+}
+
+def _task_from_dict(task_dict: Dict[str, Any]) -> BaseTask:
+    """Build the task model for a stored task dict without mutating or copying it"""
+    model = TASK_MODELS.get(task_dict.get('task_type'))
+    if model is None:
+        # Unknown or missing type: treat as transcription, as older payloads did
+        return TranscriptionTask.model_validate({**task_dict, 'task_type': TaskType.TRANSCRIPTION})
+    return model.model_validate(task_dict)
+
 class StandaloneQueueService:
     """
     Standalone queue service with backup/recovery and monitoring
@@ -94,6 +162,11 @@ class StandaloneQueueService:
         self.max_processing_time = max_processing_time  # seconds
         self.start_time = datetime.now()
         self.last_backup_time = None
+        self.redis_client = None
+        self.stats_flush_interval = 0.1  # seconds
+        self._pending_stats: Dict[str, int] = {}
+        self._stats_flusher: Optional[asyncio.Task] = None
+        self._task_pushed = asyncio.Event()  # wakes in-memory blocking pops
         self.processing_tasks: Dict[str, datetime] = {}
         self.stats = QueueStats(
             total_tasks=0,
@@ -104,23 +177,64 @@ class StandaloneQueueService:
             uptime_seconds=0
         )
         
+        # Setup signal handlers
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+    
+    async def start(self) -> "StandaloneQueueService":
+        """Connect to Redis and restore any backup; must be awaited before use"""
         # Initialize Redis connection
-        self._init_redis()
+        await self._init_redis()
         
         # Load backup on startup
-        self.load_backup()
+        await self.load_backup()
         
-        # Setup signal handlers
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        if self.redis_client:
+            self._stats_flusher = asyncio.create_task(self._run_stats_flusher())
         
         logger.info("Queue service initialized")
+        return self
+    
+    async def close(self):
+        """Stop the stats flusher and write any pending counter updates"""
+        if self._stats_flusher:
+            self._stats_flusher.cancel()
+            self._stats_flusher = None
+        await self.flush_stats()
     
-    def _init_redis(self):
+    def _incr_stat(self, field: str, amount: int = 1):
+        """Queue a queue_stats counter update; written to Redis by the stats flusher"""
+        self._pending_stats[field] = self._pending_stats.get(field, 0) + amount
+    
+    async def flush_stats(self):
+        """Write pending counter updates to Redis in one pipelined burst"""
+        if not self.redis_client or not self._pending_stats:
+            return
+        
+        pending, self._pending_stats = self._pending_stats, {}
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for field, amount in pending.items():
+                if amount:
+                    pipe.hincrby("queue_stats", field, amount)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error flushing queue stats: {e}")
+            # Keep the deltas for the next flush
+            for field, amount in pending.items():
+                self._incr_stat(field, amount)
+    
+    async def _run_stats_flusher(self):
+        """Flush counter updates in the background so queue operations never wait on them"""
+        while True:
+            await asyncio.sleep(self.stats_flush_interval)
+            await self.flush_stats()
+    
+    async def _init_redis(self):
         """Initialize Redis connection with fallback to in-memory"""
         try:
             self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
-            self.redis_client.ping()
+            await self.redis_client.ping()
             self.stats.redis_connected = True
             logger.info("Connected to Redis successfully")
         except Exception as e:
@@ -134,27 +248,51 @@ class StandaloneQueueService:
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
         logger.info(f"Received signal {signum}, performing graceful shutdown...")
-        self.save_backup()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is not None:
+            # Backup needs the event loop, so finish shutdown in a task
+            loop.create_task(self._shutdown())
+        else:
+            asyncio.run(self._shutdown())
+    
+    async def _shutdown(self):
+        """Save a final backup and exit"""
+        await self.close()
+        await self.save_backup()
         logger.info("Graceful shutdown complete")
         sys.exit(0)
     
-    def push_task(self, task: BaseTask) -> bool:
+    async def push_task(self, task: BaseTask) -> bool:
         """Add task to queue with priority support"""
         try:
             task_data = task.dict()
-            task_data['created_at'] = task_data['created_at'].isoformat()
+            # Store timestamps as epoch seconds; the task models coerce them back to datetime
+            for key in ('created_at', 'started_at', 'completed_at'):
+                if task_data.get(key) is not None:
+                    task_data[key] = task_data[key].timestamp()
             
             if self.redis_client:
+                pipe = self.redis_client.pipeline(transaction=False)
+                
                 # Store task details
-                self.redis_client.hset("queue_tasks", task.task_id, json.dumps(task_data))
+                pipe.hset("queue_tasks", task.task_id, _dumps(task_data))
+                pipe.hset(_meta_key(task.task_id), mapping={
+                    'status': task_data['status'],
+                    'progress': task_data['progress']
+                })
                 
                 # Add to priority queue (using sorted sets for priority)
-                score = task.priority * 1000000 + int(time.time())  # Priority + timestamp
-                self.redis_client.zadd("queue_priority", {task.task_id: score})
+                score = _priority_score(task.priority, time.time())
+                pipe.zadd("queue_priority", {task.task_id: score})
+                await pipe.execute()
                 
                 # Update counters
-                self.redis_client.hincrby("queue_stats", "total_tasks", 1)
-                self.redis_client.hincrby("queue_stats", "queued_tasks", 1)
+                self._incr_stat("total_tasks")
+                self._incr_stat("queued_tasks")
             else:
                 # In-memory fallback with priority sorting
                 self.memory_tasks[task.task_id] = task_data
@@ -163,6 +301,7 @@ class StandaloneQueueService:
                 
                 self.stats.total_tasks += 1
                 self.stats.queued_tasks += 1
+                self._task_pushed.set()
             
             logger.info(f"Task {task.task_id} ({task.task_type}) queued with priority {task.priority}")
             return True
@@ -171,31 +310,17 @@ class StandaloneQueueService:
             logger.error(f"Error pushing task: {e}")
             return False
     
-    def pop_task(self) -> Optional[BaseTask]:
+    async def pop_task(self) -> Optional[BaseTask]:
         """Get next task from priority queue"""
         try:
             if self.redis_client:
-                # Get highest priority task
-                task_ids = self.redis_client.zrevrange("queue_priority", 0, 0)
-                if not task_ids:
+                # Atomically take the highest priority task off the queue
+                popped = await self.redis_client.zpopmin("queue_priority")
+                if not popped:
                     return None
                 
-                task_id = task_ids[0]
-                
-                # Remove from priority queue
-                self.redis_client.zrem("queue_priority", task_id)
-                
-                # Get task data
-                task_data = self.redis_client.hget("queue_tasks", task_id)
-                if not task_data:
-                    return None
-                
-                task_dict = json.loads(task_data)
-                task_dict['created_at'] = datetime.fromisoformat(task_dict['created_at'])
-                
-                # Update counters
-                self.redis_client.hincrby("queue_stats", "queued_tasks", -1)
-                self.redis_client.hincrby("queue_stats", "processing_tasks", 1)
+                task_id, _ = popped[0]
+                return await self._claim_task(task_id)
                 
             else:
                 # In-memory fallback
@@ -203,58 +328,136 @@ class StandaloneQueueService:
                     return None
                 
                 _, _, task_id = self.memory_queue.pop(0)  # Get highest priority
-                task_dict = self.memory_tasks[task_id].copy()
-                task_dict['created_at'] = datetime.fromisoformat(task_dict['created_at'])
+                task_dict = self.memory_tasks[task_id]
                 
                 self.stats.queued_tasks -= 1
                 self.stats.processing_tasks += 1
+                
+                # Track processing start time
+                self.processing_tasks[task_id] = datetime.now()
             
-            # Track processing start time
-            self.processing_tasks[task_id] = datetime.now()
-            
-            # Create appropriate task type
-            if task_dict.get('task_type') == TaskType.TRANSCRIPTION:
-                return TranscriptionTask(**task_dict)
-            elif task_dict.get('task_type') == TaskType.RISK_DETECTION:
-                return RiskDetectionTask(**task_dict)
-            else:
-                task_dict['task_type'] = TaskType.TRANSCRIPTION
-                return TranscriptionTask(**task_dict)
+            return _task_from_dict(task_dict)
                 
         except Exception as e:
             logger.error(f"Error popping task: {e}")
             return None
     
-    def update_task_status(self, task_id: str, status: TaskStatus, **kwargs) -> bool:
-        """Update task status and metadata"""
+    async def blocking_pop_task(self, timeout: int = 5) -> Optional[BaseTask]:
+        """Wait up to timeout seconds for the next task instead of polling"""
         try:
             if self.redis_client:
-                task_data = self.redis_client.hget("queue_tasks", task_id)
+                # BZPOPMIN parks the connection server-side until a task is pushed
+                popped = await self.redis_client.bzpopmin("queue_priority", timeout=timeout)
+                if not popped:
+                    return None
+                
+                _, task_id, _ = popped
+                return await self._claim_task(task_id)
+            
+            if not self.memory_queue:
+                self._task_pushed.clear()
+                try:
+                    await asyncio.wait_for(self._task_pushed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+            return await self.pop_task()
+            
+        except Exception as e:
+            logger.error(f"Error popping task: {e}")
+            return None
+    
+    async def _claim_task(self, task_id: str) -> Optional[BaseTask]:
+        """Mark a task taken off queue_priority as processing and load it"""
+        # Get task data
+        task_data = await self.redis_client.hget("queue_tasks", task_id)
+        if not task_data:
+            return None
+        
+        task_dict = orjson.loads(task_data)
+        
+        # Track processing start time (shared by all workers)
+        await self.redis_client.zadd("queue_processing", {task_id: time.time()})
+        
+        # Update counters
+        self._incr_stat("queued_tasks", -1)
+        self._incr_stat("processing_tasks")
+        
+        return _task_from_dict(task_dict)
+    
+    @asynccontextmanager
+    async def pipeline(self):
+        """Batch Redis writes into one round trip, executed when the block exits.
+        
+        Yields None when running in-memory so callers can pass it through unchanged.
+        """
+        if not self.redis_client:
+            yield None
+            return
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        yield pipe
+        await pipe.execute()
+    
+    async def read_tasks(self, task_ids: List[str]) -> List[Optional[bytes]]:
+        """Stored JSON of each task in one round trip, None where a task is gone.
+        
+        This is the read half of a pipelined update_task_status; in-memory there
+        is nothing to read and every entry is None.
+        """
+        if not self.redis_client or not task_ids:
+            return [None] * len(task_ids)
+        return await self.redis_client.hmget("queue_tasks", task_ids)
+    
+    async def update_task_status(self, task_id: str, status: TaskStatus, pipe=None,
+                                 task_data: Optional[bytes] = None, **kwargs) -> bool:
+        """Update task status and metadata.
+        
+        With a pipe, only the writes are queued on it: the caller reads the task
+        beforehand with read_tasks and passes its task_data, so the update costs
+        no round trip of its own. Each update rewrites the whole task from that
+        copy, so queue at most one update per task on a pipe.
+        """
+        try:
+            if self.redis_client:
+                if pipe is None:
+                    task_data = await self.redis_client.hget("queue_tasks", task_id)
                 if not task_data:
                     return False
                 
-                task_dict = json.loads(task_data)
+                task_dict = orjson.loads(task_data)
                 task_dict['status'] = status.value
                 
                 # Update additional fields
                 for key, value in kwargs.items():
                     if isinstance(value, datetime):
-                        value = value.isoformat()
+                        value = value.timestamp()
                     task_dict[key] = value
                 
-                self.redis_client.hset("queue_tasks", task_id, json.dumps(task_dict))
+                own_pipe = pipe is None
+                if own_pipe:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                pipe.hset("queue_tasks", task_id, _dumps(task_dict))
+                meta = {'status': status.value}
+                if 'progress' in kwargs:
+                    meta['progress'] = kwargs['progress']
+                pipe.hset(_meta_key(task_id), mapping=meta)
                 
                 # Update counters based on status change
                 if status == TaskStatus.PROCESSING:
                     pass  # Already updated in pop_task
                 elif status == TaskStatus.COMPLETED:
-                    self.redis_client.hincrby("queue_stats", "processing_tasks", -1)
-                    self.redis_client.hincrby("queue_stats", "completed_tasks", 1)
+                    pipe.zrem("queue_processing", task_id)
+                    self._incr_stat("processing_tasks", -1)
+                    self._incr_stat("completed_tasks")
                     # Move to completed tasks for history
-                    self.redis_client.hset("queue_completed", task_id, json.dumps(task_dict))
+                    pipe.hset("queue_completed", task_id, _dumps(task_dict))
                 elif status == TaskStatus.FAILED:
-                    self.redis_client.hincrby("queue_stats", "processing_tasks", -1)
-                    self.redis_client.hincrby("queue_stats", "failed_tasks", 1)
+                    pipe.zrem("queue_processing", task_id)
+                    self._incr_stat("processing_tasks", -1)
+                    self._incr_stat("failed_tasks")
+                
+                if own_pipe:
+                    await pipe.execute()
                 
             else:
                 # In-memory fallback
@@ -266,7 +469,7 @@ class StandaloneQueueService:
                 
                 for key, value in kwargs.items():
                     if isinstance(value, datetime):
-                        value = value.isoformat()
+                        value = value.timestamp()
                     self.memory_tasks[task_id][key] = value
                 
                 # Update counters
@@ -277,10 +480,10 @@ class StandaloneQueueService:
                 elif status == TaskStatus.FAILED:
                     self.stats.processing_tasks -= 1
                     self.stats.failed_tasks += 1
-            
-            # Remove from processing tracker
-            if task_id in self.processing_tasks:
-                del self.processing_tasks[task_id]
+                
+                # Remove from processing tracker once the task is finished
+                if status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                    self.processing_tasks.pop(task_id, None)
             
             logger.info(f"Task {task_id} status updated to {status.value}")
             return True
@@ -289,61 +492,75 @@ class StandaloneQueueService:
             logger.error(f"Error updating task status: {e}")
             return False
     
-    def get_task_status(self, task_id: str) -> Optional[BaseTask]:
+    async def get_task_status(self, task_id: str) -> Optional[BaseTask]:
         """Get task details by ID"""
         try:
-            task_data = None
-            
             if self.redis_client:
                 # Check active tasks first
-                task_data = self.redis_client.hget("queue_tasks", task_id)
+                task_data = await self.redis_client.hget("queue_tasks", task_id)
                 if not task_data:
                     # Check completed tasks
-                    task_data = self.redis_client.hget("queue_completed", task_id)
+                    task_data = await self.redis_client.hget("queue_completed", task_id)
+                if not task_data:
+                    return None
+                task_dict = orjson.loads(task_data)
             else:
-                # In-memory fallback
-                if task_id in self.memory_tasks:
-                    task_data = json.dumps(self.memory_tasks[task_id])
-                elif task_id in self.memory_completed:
-                    task_data = json.dumps(self.memory_completed[task_id])
-            
-            if not task_data:
-                return None
-            
-            task_dict = json.loads(task_data)
-            
-            # Handle datetime fields
-            task_dict['created_at'] = datetime.fromisoformat(task_dict['created_at'])
-            if task_dict.get('started_at'):
-                task_dict['started_at'] = datetime.fromisoformat(task_dict['started_at'])
-            if task_dict.get('completed_at'):
-                task_dict['completed_at'] = datetime.fromisoformat(task_dict['completed_at'])
+                # In-memory fallback validates the stored dict directly, no JSON round-trip
+                task_dict = self.memory_tasks.get(task_id) or self.memory_completed.get(task_id)
+                if not task_dict:
+                    return None
             
-            # Create appropriate task type
-            if task_dict.get('task_type') == TaskType.TRANSCRIPTION:
-                return TranscriptionTask(**task_dict)
-            elif task_dict.get('task_type') == TaskType.RISK_DETECTION:
-                return RiskDetectionTask(**task_dict)
-            else:
-                task_dict['task_type'] = TaskType.TRANSCRIPTION
-                return TranscriptionTask(**task_dict)
+            return _task_from_dict(task_dict)
                 
         except Exception as e:
             logger.error(f"Error getting task status: {e}")
             return None
     
-    def get_queue_stats(self) -> QueueStats:
+    async def get_task_status_field(self, task_id: str, *fields: str) -> Dict[str, Any]:
+        """Get selected status fields (e.g. status, progress) without loading the whole task.
+        
+        Values come back as stored, so Redis returns them as strings.
+        """
+        try:
+            if self.redis_client:
+                values = await self.redis_client.hmget(_meta_key(task_id), fields)
+                if any(value is not None for value in values):
+                    return dict(zip(fields, values))
+            else:
+                task_data = self.memory_tasks.get(task_id) or self.memory_completed.get(task_id)
+                if task_data:
+                    return {field: task_data.get(field) for field in fields}
+            
+            # No metadata recorded (e.g. task queued before it existed), read the full task
+            task = await self.get_task_status(task_id)
+            if not task:
+                return {}
+            task_dict = task.dict()
+            return {field: task_dict.get(field) for field in fields}
+            
+        except Exception as e:
+            logger.error(f"Error getting task status fields: {e}")
+            return {}
+    
+    async def delete_task_meta(self, task_id: str) -> None:
+        """Drop a task's status metadata, once the task itself has been removed"""
+        if self.redis_client:
+            await self.redis_client.delete(_meta_key(task_id))
+    
+    async def get_queue_stats(self) -> QueueStats:
         """Get current queue statistics"""
         try:
             if self.redis_client:
-                stats_data = self.redis_client.hmget("queue_stats", 
+                stats_data = await self.redis_client.hmget("queue_stats", 
                     ["total_tasks", "queued_tasks", "processing_tasks", "completed_tasks", "failed_tasks"])
                 
-                self.stats.total_tasks = int(stats_data[0] or 0)
-                self.stats.queued_tasks = int(stats_data[1] or 0)
-                self.stats.processing_tasks = int(stats_data[2] or 0)
-                self.stats.completed_tasks = int(stats_data[3] or 0)
-                self.stats.failed_tasks = int(stats_data[4] or 0)
+                # Include this process's updates that have not been flushed yet
+                pending = self._pending_stats
+                self.stats.total_tasks = int(stats_data[0] or 0) + pending.get("total_tasks", 0)
+                self.stats.queued_tasks = int(stats_data[1] or 0) + pending.get("queued_tasks", 0)
+                self.stats.processing_tasks = int(stats_data[2] or 0) + pending.get("processing_tasks", 0)
+                self.stats.completed_tasks = int(stats_data[3] or 0) + pending.get("completed_tasks", 0)
+                self.stats.failed_tasks = int(stats_data[4] or 0) + pending.get("failed_tasks", 0)
                 self.stats.redis_connected = True
             else:
                 # Stats already maintained in memory
@@ -358,25 +575,46 @@ class StandaloneQueueService:
             logger.error(f"Error getting queue stats: {e}")
             return self.stats
     
-    def cleanup_stuck_tasks(self):
+    async def cleanup_stuck_tasks(self):
         """Clean up tasks that have been processing too long"""
         current_time = datetime.now()
-        stuck_tasks = []
         
-        for task_id, start_time in self.processing_tasks.items():
-            if (current_time - start_time).total_seconds() > self.max_processing_time:
-                stuck_tasks.append(task_id)
+        if self.redis_client:
+            # Sorted by start time, so this also sees tasks popped by other workers
+            cutoff = current_time.timestamp() - self.max_processing_time
+            stuck_tasks = await self.redis_client.zrangebyscore("queue_processing", "-inf", cutoff)
+        else:
+            stuck_tasks = [
+                task_id for task_id, start_time in self.processing_tasks.items()
+                if (current_time - start_time).total_seconds() > self.max_processing_time
+            ]
         
         for task_id in stuck_tasks:
             logger.warning(f"Cleaning up stuck task: {task_id}")
-            self.update_task_status(
-                task_id, 
-                TaskStatus.FAILED, 
-                error_message="Task exceeded maximum processing time",
-                completed_at=current_time
-            )
+        
+        if not stuck_tasks:
+            return
+        
+        # One read for every stuck task, then all the writes in one pipelined round trip
+        stored = await self.read_tasks(stuck_tasks)
+        async with self.pipeline() as pipe:
+            await asyncio.gather(*[
+                self.update_task_status(
+                    task_id, 
+                    TaskStatus.FAILED, 
+                    pipe=pipe,
+                    task_data=task_data,
+                    error_message="Task exceeded maximum processing time",
+                    completed_at=current_time
+                )
+                for task_id, task_data in zip(stuck_tasks, stored)
+            ])
+            
+            if pipe is not None:
+                # Drop entries whose task data no longer exists
+                pipe.zrem("queue_processing", *stuck_tasks)
     
-    def save_backup(self) -> bool:
+    async def save_backup(self) -> bool:
         """Save current state to backup file"""
         try:
             backup_data = {
@@ -391,29 +629,35 @@ class StandaloneQueueService:
             if self.redis_client:
                 # Export from Redis
                 # Get priority queue
-                queue_items = self.redis_client.zrevrange("queue_priority", 0, -1, withscores=True)
+                queue_items = await self.redis_client.zrange("queue_priority", 0, -1, withscores=True)
                 backup_data['queue'] = [(task_id, score) for task_id, score in queue_items]
                 
                 # Get all tasks
-                task_keys = self.redis_client.hkeys("queue_tasks")
+                task_keys = await self.redis_client.hkeys("queue_tasks")
                 for task_id in task_keys:
-                    task_data = self.redis_client.hget("queue_tasks", task_id)
+                    task_data = await self.redis_client.hget("queue_tasks", task_id)
                     backup_data['tasks'][task_id] = task_data
                 
                 # Get completed tasks
-                completed_keys = self.redis_client.hkeys("queue_completed")
+                completed_keys = await self.redis_client.hkeys("queue_completed")
                 for task_id in completed_keys:
-                    task_data = self.redis_client.hget("queue_completed", task_id)
+                    task_data = await self.redis_client.hget("queue_completed", task_id)
                     backup_data['completed'][task_id] = task_data
+                
+                # Get processing start times
+                processing_items = await self.redis_client.zrange("queue_processing", 0, -1, withscores=True)
+                backup_data['processing_tasks'] = {
+                    task_id: datetime.fromtimestamp(score).isoformat()
+                    for task_id, score in processing_items
+                }
             else:
                 # Export from memory
                 backup_data['queue'] = self.memory_queue
-                backup_data['tasks'] = {k: json.dumps(v) for k, v in self.memory_tasks.items()}
-                backup_data['completed'] = {k: json.dumps(v) for k, v in self.memory_completed.items()}
+                backup_data['tasks'] = {k: _dumps(v) for k, v in self.memory_tasks.items()}
+                backup_data['completed'] = {k: _dumps(v) for k, v in self.memory_completed.items()}
             
-            # Write backup file
-            with open(self.backup_file, 'wb') as f:
-                pickle.dump(backup_data, f)
+            # Write backup file off the event loop
+            await asyncio.to_thread(_write_backup, self.backup_file, backup_data)
             
             self.last_backup_time = datetime.now()
             logger.info(f"Backup saved to {self.backup_file}")
@@ -423,21 +667,20 @@ class StandaloneQueueService:
             logger.error(f"Error saving backup: {e}")
             return False
     
-    def load_backup(self) -> bool:
+    async def load_backup(self) -> bool:
         """Load state from backup file"""
         try:
             if not os.path.exists(self.backup_file):
                 logger.info("No backup file found")
                 return False
             
-            with open(self.backup_file, 'rb') as f:
-                backup_data = pickle.load(f)
+            backup_data = await asyncio.to_thread(_read_backup, self.backup_file)
             
             restored_tasks = 0
             
             if self.redis_client:
                 # Clear existing data
-                self.redis_client.delete("queue_priority", "queue_tasks", "queue_completed", "queue_stats")
+                await self.redis_client.delete("queue_priority", "queue_processing", "queue_tasks", "queue_completed", "queue_stats")
                 
                 # Restore priority queue
                 if backup_data.get('queue'):
@@ -445,43 +688,53 @@ class StandaloneQueueService:
                     for item in backup_data['queue']:
                         if isinstance(item, tuple) and len(item) == 2:
                             task_id, score = item
-                            priority_mapping[task_id] = float(score)
+                            task_data = backup_data.get('tasks', {}).get(task_id)
+                            priority = orjson.loads(task_data).get('priority', 0) if task_data else 0
+                            priority_mapping[task_id] = _restored_score(float(score), priority)
                         elif isinstance(item, (list, tuple)) and len(item) >= 3:
                             # Old format: (priority, timestamp, task_id)
                             priority, timestamp, task_id = item[:3]
-                            score = priority * 1000000 + timestamp
-                            priority_mapping[task_id] = score
+                            priority_mapping[task_id] = _priority_score(priority, timestamp)
                     
                     if priority_mapping:
-                        self.redis_client.zadd("queue_priority", priority_mapping)
+                        await self.redis_client.zadd("queue_priority", priority_mapping)
                         restored_tasks = len(priority_mapping)
                 
                 # Restore tasks
                 if backup_data.get('tasks'):
                     for task_id, task_data in backup_data['tasks'].items():
-                        self.redis_client.hset("queue_tasks", task_id, task_data)
+                        await self.redis_client.hset("queue_tasks", task_id, task_data)
                 
                 # Restore completed tasks
                 if backup_data.get('completed'):
                     for task_id, task_data in backup_data['completed'].items():
-                        self.redis_client.hset("queue_completed", task_id, task_data)
+                        await self.redis_client.hset("queue_completed", task_id, task_data)
+                
+                # Rebuild status metadata so it matches the restored tasks
+                restored = {**backup_data.get('completed', {}), **backup_data.get('tasks', {})}
+                for task_id, task_data in restored.items():
+                    task_dict = orjson.loads(task_data)
+                    await self.redis_client.hset(_meta_key(task_id), mapping={
+                        'status': task_dict.get('status', TaskStatus.QUEUED.value),
+                        'progress': task_dict.get('progress', 0.0)
+                    })
                 
                 # Restore stats
                 if backup_data.get('stats'):
                     for key, value in backup_data['stats'].items():
                         if key not in ['uptime_seconds', 'last_backup']:  # Skip computed fields
-                            self.redis_client.hset("queue_stats", key, str(value))
+                            await self.redis_client.hset("queue_stats", key, str(value))
             else:
                 # In-memory restore
                 self.memory_queue = backup_data.get('queue', [])
                 
                 if backup_data.get('tasks'):
-                    self.memory_tasks = {k: json.loads(v) for k, v in backup_data['tasks'].items()}
+                    self.memory_tasks = {k: orjson.loads(v) for k, v in backup_data['tasks'].items()}
                 else:
                     self.memory_tasks = {}
                 
                 if backup_data.get('completed'):
-                    self.memory_completed = {k: json.loads(v) for k, v in backup_data['completed'].items()}
+                    self.memory_completed = {k: orjson.loads(v) for k, v in backup_data['completed'].items()}
                 else:
                     self.memory_completed = {}
                 
@@ -494,16 +747,22 @@ class StandaloneQueueService:
             
             # Restore processing tasks
             if backup_data.get('processing_tasks'):
-                self.processing_tasks = {
+                processing_tasks = {
                     k: datetime.fromisoformat(v) 
                     for k, v in backup_data['processing_tasks'].items()
                 }
+                if self.redis_client:
+                    await self.redis_client.zadd("queue_processing", {
+                        k: v.timestamp() for k, v in processing_tasks.items()
+                    })
+                else:
+                    self.processing_tasks = processing_tasks
             
             logger.info(f"Backup restored: {restored_tasks} tasks from {backup_data.get('timestamp', 'unknown time')}")
             
-            # Remove backup file after successful restore
-            os.remove(self.backup_file)
-            logger.info("Backup file removed after successful restore")
+            # Keep the restored backup aside so a crash before the next backup still leaves a copy
+            os.replace(self.backup_file, self.backup_file + ".restored")
+            logger.info(f"Backup file moved to {self.backup_file}.restored after successful restore")
             
             return True
             
@@ -517,12 +776,12 @@ class StandaloneQueueService:
             try:
                 # Save backup periodically
                 if (datetime.now() - (self.last_backup_time or datetime.min)).total_seconds() > self.backup_interval:
-                    if self.get_queue_stats().total_tasks > 0:
+                    if (await self.get_queue_stats()).total_tasks > 0:
                         logger.info("Performing periodic backup...")
-                        self.save_backup()
+                        await self.save_backup()
                 
                 # Clean up stuck tasks
-                self.cleanup_stuck_tasks()
+                await self.cleanup_stuck_tasks()
                 
                 await asyncio.sleep(60)  # Run every minute
                 
@@ -547,6 +806,7 @@ async def main():
         backup_interval=args.backup_interval,
         max_processing_time=args.max_processing_time
     )
+    await queue_service.start()
     
     logger.info("Starting standalone queue service...")
     logger.info(f"Redis URL: {args.redis_url}")
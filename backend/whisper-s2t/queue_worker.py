@@ -5,23 +5,31 @@ Connects to the queue service and processes tasks
 """
 import asyncio
 import argparse
+import hashlib
+import json
 import logging
+import re
 import signal
 import sys
+import time
 from datetime import datetime
+from itertools import product
 from typing import Optional
 
+import ahocorasick
+import aiohttp
+
 from queue_service import (
     StandaloneQueueService, TranscriptionTask, RiskDetectionTask, 
     TaskStatus, TaskType
 )
-from transcription_service import TranscriptionService
+from transcription_service import get_service
 import os
 import gc
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler('queue_worker.log'),
@@ -30,17 +38,138 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Patterns used to pull the verdict out of Ollama responses
+_THINK_RE = re.compile(r'<think>[\s\S]*?</think>\s*([\s\S]*?)$', re.IGNORECASE)
+_BOXED_RE = re.compile(r'\\?boxed\s*\{\s*([^}]+)\s*\}', re.IGNORECASE)
+
+# Verdict evidence bits, lowest bit = highest precedence. Within each source
+# (think tail > direct answer > boxed answer > fallback) guilty beats innocent.
+THINK_GUILTY = 1
+THINK_INNOCENT = 2
+DIRECT_GUILTY = 4
+DIRECT_INNOCENT = 8
+BOXED_YES = 16
+BOXED_NO = 32
+FALLBACK_YES = 64
+FALLBACK_NO = 128
+
+_GUILTY = 'เข้าข่ายผิด'
+_INNOCENT = 'ไม่ผิด'
+_UNKNOWN = 'ไม่สามารถวิเคราะห์ได้'
+_VERDICTS = {
+    THINK_GUILTY: _GUILTY, THINK_INNOCENT: _INNOCENT,
+    DIRECT_GUILTY: _GUILTY, DIRECT_INNOCENT: _INNOCENT,
+    BOXED_YES: _GUILTY, BOXED_NO: _INNOCENT,
+    FALLBACK_YES: _GUILTY, FALLBACK_NO: _INNOCENT,
+}
+
+# keyword -> (bits anywhere in the response, bits inside the think tail, bits inside a boxed answer)
+_RISK_KEYWORDS = {
+    'เข้าข่ายผิด': (DIRECT_GUILTY, THINK_GUILTY, 0),
+    'ผิดกฎหมาย': (DIRECT_GUILTY, THINK_GUILTY, 0),
+    'ไม่ผิด': (DIRECT_INNOCENT, THINK_INNOCENT, 0),
+    'ไม่เข้าข่าย': (DIRECT_INNOCENT, THINK_INNOCENT, BOXED_NO),
+    'ไม่มีความเสี่ยง': (DIRECT_INNOCENT, 0, 0),
+    'เข้าข่าย': (0, 0, BOXED_YES),
+    'ใช่': (FALLBACK_YES, 0, BOXED_YES),
+    'yes': (FALLBACK_YES, 0, BOXED_YES),
+    'ไม่ใช่': (FALLBACK_NO, 0, BOXED_NO),
+    'no': (FALLBACK_NO, 0, BOXED_NO),
+}
+
+# Thai has no case, so only the English keywords need every casing added to the automaton
+_RISK_AUTOMATON = ahocorasick.Automaton()
+for _keyword, _bits in _RISK_KEYWORDS.items():
+    for _variant in map(''.join, product(*({c, c.upper()} for c in _keyword))):
+        _RISK_AUTOMATON.add_word(_variant, (len(_keyword),) + _bits)
+_RISK_AUTOMATON.make_automaton()
+
+def _risk_mask(response: str) -> int:
+    """OR together the evidence bits of every keyword hit in one pass over the response"""
+    think_match = _THINK_RE.search(response)
+    think_start = think_match.start(1) if think_match else len(response) + 1
+    boxed_match = _BOXED_RE.search(response)
+    boxed_start, boxed_end = boxed_match.span(1) if boxed_match else (0, -1)
+    
+    mask = 0
+    for end, (length, anywhere, in_think, in_boxed) in _RISK_AUTOMATON.iter(response):
+        start = end - length + 1
+        mask |= anywhere
+        if start >= think_start:
+            mask |= in_think
+        if start >= boxed_start and end < boxed_end:
+            mask |= in_boxed
+    return mask
+
+# Keywords whose hit after </think> has the highest precedence of any evidence
+_FINAL_KEYWORDS = tuple(keyword for keyword, bits in _RISK_KEYWORDS.items() if bits[1] & THINK_GUILTY)
+_FINAL_KEYWORD_LEN = max(map(len, _FINAL_KEYWORDS))
+
+class _VerdictWatch:
+    """Spots, as a response streams in, the point where the offence verdict is final.
+    
+    A guilty keyword in the answer after </think> has the highest precedence and
+    nothing streamed later can override it, so generation can be stopped there.
+    The negative verdicts are not final: 'ไม่ผิด' may still grow into 'ไม่ผิดกฎหมาย'.
+    Each piece is scanned once, carrying over only enough text to catch a tag or
+    keyword split across pieces, so watching stays linear in the response.
+    """
+    
+    def __init__(self):
+        self.pending = ''
+        self.markers = ['<think>', '</think>']  # still to be seen, in order
+    
+    def feed(self, piece: str) -> bool:
+        """Add the next streamed piece; True once the verdict is final"""
+        text = self.pending + piece
+        while self.markers:
+            index = text.lower().find(self.markers[0])
+            if index < 0:
+                self.pending = text[-(len(self.markers[0]) - 1):]
+                return False
+            text = text[index + len(self.markers.pop(0)):]
+        if any(keyword in text for keyword in _FINAL_KEYWORDS):
+            return True
+        self.pending = text[-(_FINAL_KEYWORD_LEN - 1):]
+        return False
+
+def _unlink_quiet(path: str) -> bool:
+    """Remove a file, ignoring it if it is already gone"""
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(f"Could not remove {path}: {e}")
+        return False
+
 class RiskDetectionProcessor:
     """Handles risk detection processing using Ollama API"""
     
     def __init__(self):
         self.ollama_url = "http://localhost:11434/api/generate"
         self.model_name = "qwen3:8b"
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache_ttl = 86400  # seconds to reuse a verdict for the same text
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Keep connections to Ollama alive between tasks
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=60)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     async def call_ollama_api(self, text: str) -> str:
         """Call Ollama API for risk detection"""
-        import aiohttp
-        
         prompt = f"""ประโยคเหล่านี้ มีข้อความที่เสี่ยงต่อการทำผิดกฎหมายหรือไม่ 
 ```
 {text}
@@ -48,85 +177,108 @@ class RiskDetectionProcessor:
 ตอบแค่เข้าข่ายผิด หรือ ไม่ผิดเท่านั้น ไม่ต้องตอบรายละเอียดอย่างยาว"""
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.ollama_url,
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                ) as response:
-                    if not response.ok:
-                        raise Exception(f"Ollama API error: {response.status}")
-                    
-                    data = await response.json()
-                    return data.get('response', 'ไม่สามารถวิเคราะห์ได้')
+            async with self._get_session().post(
+                self.ollama_url,
+                json={
+                    "model": self.model_name,
+                    "prompt": prompt,
+                    "stream": True
+                }
+            ) as response:
+                if not response.ok:
+                    raise Exception(f"Ollama API error: {response.status}")
+                
+                # Ollama streams one JSON object per line; stop reading as soon
+                # as the verdict can no longer change so decoding is cut short
+                pieces = []
+                watch = _VerdictWatch()
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        raise Exception(f"Ollama API error: {chunk['error']}")
+                    piece = chunk.get('response', '')
+                    pieces.append(piece)
+                    if chunk.get('done') or watch.feed(piece):
+                        break
+                
+                return ''.join(pieces) or _UNKNOWN
         except Exception as e:
             logger.error(f"Error calling Ollama API: {e}")
             raise Exception('Failed to analyze risk')
     
     def extract_risk_result(self, response: str) -> str:
         """Extract risk result from Ollama response"""
-        lower_response = response.lower()
-        
-        # Check for response after <think> section
-        import re
-        think_match = re.search(r'<think>[\s\S]*?</think>\s*([\s\S]*?)$', response, re.IGNORECASE)
-        if think_match:
-            after_think = think_match.group(1).strip().lower()
-            if 'เข้าข่ายผิด' in after_think or 'ผิดกฎหมาย' in after_think:
-                return 'เข้าข่ายผิด'
-            elif 'ไม่ผิด' in after_think or 'ไม่เข้าข่าย' in after_think:
-                return 'ไม่ผิด'
-        
-        # Direct Thai answers
-        if 'เข้าข่ายผิด' in lower_response or 'ผิดกฎหมาย' in lower_response:
-            return 'เข้าข่ายผิด'
-        elif 'ไม่ผิด' in lower_response or 'ไม่เข้าข่าย' in lower_response or 'ไม่มีความเสี่ยง' in lower_response:
-            return 'ไม่ผิด'
-        
-        # Check for boxed answers
-        boxed_match = re.search(r'\\?boxed\s*\{\s*([^}]+)\s*\}', response, re.IGNORECASE)
-        if boxed_match:
-            boxed_content = boxed_match.group(1).strip().lower()
-            if 'ใช่' in boxed_content or 'yes' in boxed_content or 'เข้าข่าย' in boxed_content:
-                return 'เข้าข่ายผิด'
-            elif 'ไม่ใช่' in boxed_content or 'no' in boxed_content or 'ไม่เข้าข่าย' in boxed_content:
-                return 'ไม่ผิด'
-        
-        # Fallback keyword matching
-        if 'ใช่' in lower_response or 'yes' in lower_response:
-            return 'เข้าข่ายผิด'
-        elif 'ไม่ใช่' in lower_response or 'no' in lower_response:
-            return 'ไม่ผิด'
-        
-        return 'ไม่สามารถวิเคราะห์ได้'
+        mask = _risk_mask(response)
+        # Lowest set bit is the highest-precedence evidence found
+        return _VERDICTS.get(mask & -mask, _UNKNOWN)
+    
+    def _cache_key(self, text: str) -> str:
+        """Redis key for a text's verdict; whitespace is collapsed so re-transcriptions hit"""
+        normalized = ' '.join(text.split())
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return f"risk:{self.model_name}:{digest}"
+    
+    async def get_cached_result(self, text: str, queue_service: StandaloneQueueService) -> Optional[dict]:
+        """Look up a previous verdict for this text"""
+        if not queue_service.redis_client:
+            return None
+        try:
+            cached = await queue_service.redis_client.get(self._cache_key(text))
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning(f"Risk cache lookup failed: {e}")
+            return None
+    
+    async def cache_result(self, text: str, cached: dict, queue_service: StandaloneQueueService):
+        """Remember a verdict for cache_ttl seconds"""
+        if not queue_service.redis_client:
+            return
+        try:
+            await queue_service.redis_client.setex(self._cache_key(text), self.cache_ttl, json.dumps(cached))
+        except Exception as e:
+            logger.warning(f"Risk cache write failed: {e}")
     
     async def process_task(self, task: RiskDetectionTask, queue_service: StandaloneQueueService) -> bool:
         """Process a risk detection task"""
+        # Epoch seconds, the form the queue service stores, so no datetime round trip
+        t0 = time.time()
         try:
             logger.info(f"Processing risk detection task: {task.task_id}")
             
             # Update status to processing
-            queue_service.update_task_status(
+            await queue_service.update_task_status(
                 task.task_id, 
                 TaskStatus.PROCESSING, 
-                started_at=datetime.now(),
+                started_at=t0,
                 progress=0.1
             )
             
-            # Call Ollama API
-            queue_service.update_task_status(task.task_id, TaskStatus.PROCESSING, progress=0.5)
-            
-            ollama_response = await self.call_ollama_api(task.text)
-            risk_result = self.extract_risk_result(ollama_response)
+            cached = await self.get_cached_result(task.text, queue_service)
+            if cached:
+                logger.info(f"Risk detection task {task.task_id} answered from cache")
+                risk_result = cached["risk_result"]
+                ollama_response = cached["ollama_response"]
+            else:
+                # Call Ollama API
+                await queue_service.update_task_status(task.task_id, TaskStatus.PROCESSING, progress=0.5)
+                
+                ollama_response = await self.call_ollama_api(task.text)
+                risk_result = self.extract_risk_result(ollama_response)
+                
+                # Only cache decisive verdicts so a bad response gets retried next time
+                if risk_result != _UNKNOWN:
+                    await self.cache_result(task.text, {
+                        "risk_result": risk_result,
+                        "ollama_response": ollama_response
+                    }, queue_service)
             
             # Complete the task
-            queue_service.update_task_status(
+            await queue_service.update_task_status(
                 task.task_id,
                 TaskStatus.COMPLETED,
-                completed_at=datetime.now(),
+                completed_at=time.time(),
                 result={
                     "risk_result": risk_result,
                     "ollama_response": ollama_response,
@@ -143,10 +295,10 @@ class RiskDetectionProcessor:
             logger.error(f"Error processing risk detection task {task.task_id}: {error_message}")
             
             # Update status to failed
-            queue_service.update_task_status(
+            await queue_service.update_task_status(
                 task.task_id,
                 TaskStatus.FAILED,
-                completed_at=datetime.now(),
+                completed_at=time.time(),
                 error_message=error_message,
                 progress=0.0
             )
@@ -158,16 +310,23 @@ class QueueWorker:
     
     def __init__(self, redis_url: str = "redis://localhost:6379", 
                  worker_id: Optional[str] = None,
-                 poll_interval: int = 1):
+                 poll_interval: int = 1,
+                 concurrency: int = 1):
         self.redis_url = redis_url
         self.worker_id = worker_id or f"worker-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
         self.poll_interval = poll_interval
+        self.concurrency = max(1, concurrency)  # task loops sharing this process's model
+        self.pop_timeout = 5  # seconds to block waiting for a task
+        self.gc_every = 10  # transcription tasks between full collections
+        self._tasks_since_gc = 0
         self.running = True
         
         # Initialize services
         self.queue_service = StandaloneQueueService(redis_url=redis_url)
-        self.transcription_service = TranscriptionService()
+        self.transcription_service = get_service()
         self.risk_detection_processor = RiskDetectionProcessor()
+        # Transcriptions share the model, up to as many at once as it has workers
+        self._transcribe_lock = asyncio.Semaphore(self.transcription_service.max_concurrency)
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -182,6 +341,8 @@ class QueueWorker:
     
     async def process_transcription_task(self, task: TranscriptionTask) -> bool:
         """Process a transcription task"""
+        # Epoch seconds, the form the queue service stores, so no datetime round trip
+        t0 = time.time()
         try:
             logger.info(f"Processing transcription task: {task.task_id}")
             
@@ -189,38 +350,65 @@ class QueueWorker:
                 raise Exception("Transcription service not available")
             
             # Update status to processing
-            self.queue_service.update_task_status(
+            await self.queue_service.update_task_status(
                 task.task_id, 
                 TaskStatus.PROCESSING, 
-                started_at=datetime.now(),
+                started_at=t0,
                 progress=0.1
             )
             
-            # Update progress
-            self.queue_service.update_task_status(task.task_id, TaskStatus.PROCESSING, progress=0.3)
+            # Progress arrives on the transcription thread as segments are decoded; each
+            # step of at least 5% is written to the task from the event loop. Every
+            # write waits for the one before it, so progress is stored in order
+            loop = asyncio.get_running_loop()
+            progress_write = None
+            last_progress = 0.1
             
-            # Use the transcription service
-            result = self.transcription_service.transcribe_audio(task.file_path, task.language)
+            async def write_progress(progress: float, previous):
+                if previous is not None:
+                    await asyncio.wrap_future(previous)
+                await self.queue_service.update_task_status(task.task_id, TaskStatus.PROCESSING, progress=progress)
             
-            # Update progress
-            self.queue_service.update_task_status(task.task_id, TaskStatus.PROCESSING, progress=0.9)
+            def report_progress(fraction: float):
+                nonlocal last_progress, progress_write
+                progress = 0.1 + 0.8 * fraction
+                if progress - last_progress >= 0.05:
+                    last_progress = progress
+                    progress_write = asyncio.run_coroutine_threadsafe(
+                        write_progress(progress, progress_write), loop
+                    )
             
-            # Clean up temporary file
-            if os.path.exists(task.file_path):
-                os.remove(task.file_path)
-                logger.info(f"Cleaned up temp file: {task.file_path}")
+            # Use the transcription service; run it in a thread so the other
+            # task loops (e.g. risk detection) keep going while it decodes
+            async with self._transcribe_lock:
+                try:
+                    result = await asyncio.to_thread(
+                        self.transcription_service.transcribe_audio, task.file_path, task.language, report_progress
+                    )
+                finally:
+                    # A progress write still in flight would overwrite the final status;
+                    # the last one finishes only after all the others
+                    if progress_write is not None:
+                        await asyncio.gather(asyncio.wrap_future(progress_write), return_exceptions=True)
             
-            # Force garbage collection
-            gc.collect()
+            # Periodic full collection, run off the event loop
+            self._tasks_since_gc += 1
+            if self._tasks_since_gc >= self.gc_every:
+                self._tasks_since_gc = 0
+                await asyncio.get_running_loop().run_in_executor(None, gc.collect)
             
-            # Update status to completed
-            self.queue_service.update_task_status(
-                task.task_id,
-                TaskStatus.COMPLETED,
-                completed_at=datetime.now(),
-                result=result,
-                progress=1.0
-            )
+            # Read the task, then write its completion in one pipelined round trip
+            task_data, = await self.queue_service.read_tasks([task.task_id])
+            async with self.queue_service.pipeline() as pipe:
+                await self.queue_service.update_task_status(
+                    task.task_id,
+                    TaskStatus.COMPLETED,
+                    pipe=pipe,
+                    task_data=task_data,
+                    completed_at=time.time(),
+                    result=result,
+                    progress=1.0
+                )
             
             logger.info(f"Transcription task {task.task_id} completed successfully")
             return True
@@ -229,61 +417,69 @@ class QueueWorker:
             error_message = str(e)
             logger.error(f"Error processing transcription task {task.task_id}: {error_message}")
             
-            # Clean up on error
-            if os.path.exists(task.file_path):
-                os.remove(task.file_path)
-            
             # Update status to failed
-            self.queue_service.update_task_status(
+            await self.queue_service.update_task_status(
                 task.task_id,
                 TaskStatus.FAILED,
-                completed_at=datetime.now(),
+                completed_at=time.time(),
                 error_message=error_message,
                 progress=0.0
             )
             
             return False
-    
-    async def run(self):
-        """Main worker loop"""
-        logger.info(f"Worker {self.worker_id} starting...")
         
+        finally:
+            # Clean up temporary file on both success and error
+            if _unlink_quiet(task.file_path):
+                logger.info(f"Cleaned up temp file: {task.file_path}")
+    
+    async def _task_loop(self, loop_id: str):
+        """Take tasks off the queue and process them until shutdown"""
         while self.running:
             try:
-                # Check if there are tasks in the queue
-                stats = self.queue_service.get_queue_stats()
+                # Sleep on the queue until a task arrives or the timeout lets us re-check running
+                task = await self.queue_service.blocking_pop_task(timeout=self.pop_timeout)
                 
-                if stats.queued_tasks > 0:
-                    # Get next task
-                    task = self.queue_service.pop_task()
+                if task:
+                    logger.info(f"Worker {loop_id} got task {task.task_id} of type {task.task_type}")
                     
-                    if task:
-                        logger.info(f"Worker {self.worker_id} got task {task.task_id} of type {task.task_type}")
-                        
-                        # Process task based on type
-                        success = False
-                        if isinstance(task, TranscriptionTask):
-                            success = await self.process_transcription_task(task)
-                        elif isinstance(task, RiskDetectionTask):
-                            success = await self.risk_detection_processor.process_task(task, self.queue_service)
-                        else:
-                            logger.error(f"Unknown task type: {type(task)}")
-                        
-                        if success:
-                            logger.info(f"Worker {self.worker_id} completed task {task.task_id}")
-                        else:
-                            logger.error(f"Worker {self.worker_id} failed to process task {task.task_id}")
+                    # Process task based on type
+                    success = False
+                    if isinstance(task, TranscriptionTask):
+                        success = await self.process_transcription_task(task)
+                    elif isinstance(task, RiskDetectionTask):
+                        success = await self.risk_detection_processor.process_task(task, self.queue_service)
                     else:
-                        # No task available, wait a bit
-                        await asyncio.sleep(self.poll_interval)
-                else:
-                    # No tasks in queue, wait a bit
-                    await asyncio.sleep(self.poll_interval)
+                        logger.error(f"Unknown task type: {type(task)}")
+                    
+                    if success:
+                        logger.info(f"Worker {loop_id} completed task {task.task_id}")
+                    else:
+                        logger.error(f"Worker {loop_id} failed to process task {task.task_id}")
             
             except Exception as e:
-                logger.error(f"Error in worker {self.worker_id} main loop: {e}")
+                logger.error(f"Error in worker {loop_id} main loop: {e}")
                 await asyncio.sleep(self.poll_interval * 5)  # Wait longer on error
+    
+    async def run(self):
+        """Main worker loop"""
+        logger.info(f"Worker {self.worker_id} starting with {self.concurrency} task loop(s)...")
+        await self.queue_service.start()
+        
+        # Load the model before any task loop runs, off the event loop, so the first
+        # task does not stall every loop and Redis write behind a multi-GB load
+        await asyncio.to_thread(lambda: self.transcription_service.model)
+        
+        if self.concurrency == 1:
+            await self._task_loop(self.worker_id)
+        else:
+            await asyncio.gather(*[
+                self._task_loop(f"{self.worker_id}/{i + 1}")
+                for i in range(self.concurrency)
+            ])
         
+        await self.risk_detection_processor.close()
+        await self.queue_service.close()
         logger.info(f"Worker {self.worker_id} stopped")
 
 async def main():
@@ -292,6 +488,7 @@ async def main():
     parser.add_argument("--redis-url", default="redis://localhost:6379", help="Redis URL")
     parser.add_argument("--worker-id", help="Worker ID (auto-generated if not provided)")
     parser.add_argument("--poll-interval", type=int, default=1, help="Poll interval in seconds")
+    parser.add_argument("--concurrency", type=int, default=1, help="Task loops sharing one model in this process")
     
     args = parser.parse_args()
     
@@ -299,12 +496,14 @@ async def main():
     worker = QueueWorker(
         redis_url=args.redis_url,
         worker_id=args.worker_id,
-        poll_interval=args.poll_interval
+        poll_interval=args.poll_interval,
+        concurrency=args.concurrency
     )
     
     logger.info(f"Starting queue worker with Redis URL: {args.redis_url}")
     logger.info(f"Worker ID: {worker.worker_id}")
     logger.info(f"Poll interval: {args.poll_interval}s")
+    logger.info(f"Concurrency: {args.concurrency}")
     
     # Run worker
     await worker.run()
@@ -1,8 +1,7 @@
 import pyaudio
-import wave
 from pydub import AudioSegment
 from datetime import datetime
-import os
+import time
 
 # Parameters for recording
 FORMAT = pyaudio.paInt16  # Audio format
@@ -10,26 +9,35 @@ CHANNELS = 1              # Number of channels (mono)
 RATE = 44100              # Sampling rate
 CHUNK = 1024              # Buffer size
 RECORD_SECONDS = 30        # Duration of recording
-WAV_FILENAME = "output.wav"
 MP3_FILENAME = "output.mp3"
 
 # Initialize PyAudio
 audio = pyaudio.PyAudio()
 
+# Preallocate the whole recording; the stream callback copies each chunk into place
+buf = bytearray(RATE * RECORD_SECONDS * CHANNELS * audio.get_sample_size(FORMAT))
+mv = memoryview(buf)
+off = 0
+
+def record_callback(in_data, frame_count, time_info, status):
+    global off
+    n = min(len(in_data), len(buf) - off)
+    mv[off:off + n] = in_data[:n]
+    off += n
+    return (None, pyaudio.paContinue if off < len(buf) else pyaudio.paComplete)
+
 # Start recording
 stream = audio.open(format=FORMAT,
                     channels=CHANNELS,
                     rate=RATE,
                     input=True,
-                    frames_per_buffer=CHUNK)
+                    frames_per_buffer=CHUNK,
+                    stream_callback=record_callback)
 
 print("Recording started...")
 
-frames = []
-
-for i in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
-    data = stream.read(CHUNK)
-    frames.append(data)
+while stream.is_active():
+    time.sleep(0.1)
 
 print("Recording stopped.")
 
@@ -38,18 +46,11 @@ stream.stop_stream()
 stream.close()
 audio.terminate()
 
-# Save as WAV file
-with wave.open(WAV_FILENAME, 'wb') as wf:
-    wf.setnchannels(CHANNELS)
-    wf.setsampwidth(audio.get_sample_size(FORMAT))
-    wf.setframerate(RATE)
-    wf.writeframes(b''.join(frames))
-
-# Convert WAV to MP3
-sound = AudioSegment.from_wav(WAV_FILENAME)
+# Encode the captured PCM straight to MP3, no intermediate WAV file
+sound = AudioSegment(data=bytes(mv[:off]),
+                     sample_width=audio.get_sample_size(FORMAT),
+                     frame_rate=RATE,
+                     channels=CHANNELS)
 sound.export(MP3_FILENAME, format="mp3")
 
-# Optional: Remove the WAV file
-os.remove(WAV_FILENAME)
-
 print(f"Audio saved as {MP3_FILENAME}")
\ No newline at end of file
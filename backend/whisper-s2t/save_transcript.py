@@ -1,67 +1,92 @@
-import json
 import csv
 import os
-import pandas as pd
 import sys
 
+import ijson
+
+# Rows go to disk in 1 MiB writes rather than the default 8 KiB
+CSV_BUFFER_SIZE = 1 << 20
+
+SEGMENT_HEADER = ['Segment ID', 'Start Time', 'End Time', 'Text', 'Confidence']
+WORD_HEADER = ['Segment ID', 'Word', 'Start Time', 'End Time', 'Confidence']
+
+def segment_row(segment):
+    """CSV row of a segment, in SEGMENT_HEADER order"""
+    return [
+        segment.get('id', ''),
+        segment.get('start', ''),
+        segment.get('end', ''),
+        segment.get('text', ''),
+        segment.get('confidence', '')
+    ]
+
+def word_rows(segment):
+    """CSV rows of a segment's words, in WORD_HEADER order"""
+    segment_id = segment.get('id', '')
+    for word in segment.get('words', []):
+        yield [
+            segment_id,
+            word.get('text', ''),
+            word.get('start', ''),
+            word.get('end', ''),
+            word.get('confidence', '')
+        ]
+
 def save_segments_to_csv(result, output_file="transcript_segments.csv"):
     """Save transcript segments to CSV file."""
-    segments = result.get("segments", [])
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
         writer = csv.writer(f)
-        writer.writerow(['Segment ID', 'Start Time', 'End Time', 'Text', 'Confidence'])
-        
-        for segment in segments:
-            writer.writerow([
-                segment.get('id', ''),
-                segment.get('start', ''),
-                segment.get('end', ''),
-                segment.get('text', ''),
-                segment.get('confidence', '')
-            ])
+        writer.writerow(SEGMENT_HEADER)
+        writer.writerows(map(segment_row, result.get("segments", [])))
     
     print(f"Segments saved to {output_file}")
     return output_file
 
 def save_words_to_csv(result, output_file="transcript_words.csv"):
     """Save individual words with timestamps to CSV file."""
-    all_words = []
-    
-    for segment in result.get("segments", []):
-        segment_id = segment.get('id', '')
-        for word in segment.get('words', []):
-            all_words.append({
-                'Segment ID': segment_id,
-                'Word': word.get('text', ''),
-                'Start Time': word.get('start', ''),
-                'End Time': word.get('end', ''),
-                'Confidence': word.get('confidence', '')
-            })
-    
-    # Convert to DataFrame for easier CSV handling with Thai characters
-    df = pd.DataFrame(all_words)
-    df.to_csv(output_file, index=False, encoding='utf-8')
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(WORD_HEADER)
+        for segment in result.get("segments", []):
+            writer.writerows(word_rows(segment))
     
     print(f"Words saved to {output_file}")
     return output_file
 
+def save_both(result, segments_file="transcript_segments.csv", words_file="transcript_words.csv"):
+    """Save segments and words to their CSV files in a single pass over the segments."""
+    return save_segments_and_words(result.get("segments", []), segments_file, words_file)
+
+def save_segments_and_words(segments, segments_file="transcript_segments.csv", words_file="transcript_words.csv"):
+    """Save segments and words from any iterable of segments, e.g. a streaming parser."""
+    with open(segments_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as seg_f, \
+         open(words_file, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as word_f:
+        segment_writer = csv.writer(seg_f)
+        segment_writer.writerow(SEGMENT_HEADER)
+        word_writer = csv.writer(word_f)
+        word_writer.writerow(WORD_HEADER)
+        
+        for segment in segments:
+            segment_writer.writerow(segment_row(segment))
+            word_writer.writerows(word_rows(segment))
+    
+    print(f"Segments saved to {segments_file}")
+    print(f"Words saved to {words_file}")
+    return segments_file, words_file
+
 def main():
     # Use the result from whisper_timestamped
     input_file = "transcript_result.json"
     
-    # If result was saved to a file, load it
-    if os.path.exists(input_file):
-        with open(input_file, 'r', encoding='utf-8') as f:
-            result = json.load(f)
-    else:
+    if not os.path.exists(input_file):
         # If not saved yet, you can modify the script to use the result directly
         print(f"File {input_file} not found. Please run the transcription first and save the result.")
         return
     
-    # Save both formats
-    save_segments_to_csv(result)
-    save_words_to_csv(result)
+    # Stream the segments one at a time instead of loading the whole result
+    with open(input_file, 'rb') as f:
+        segments = ijson.items(f, 'segments.item', use_float=True)
+        save_segments_and_words(segments)
     
     print("Transcription saved successfully!")
 
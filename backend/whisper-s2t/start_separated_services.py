@@ -4,13 +4,15 @@ Service Orchestrator for Separated Queue System
 Starts and manages all components of the separated queue system
 """
 import asyncio
+import socket
 import subprocess
 import signal
 import sys
 import time
 import os
 import argparse
-from typing import List, Dict
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
 import psutil
 import logging
 
@@ -24,11 +26,17 @@ logger = logging.getLogger(__name__)
 class ServiceManager:
     """Manages multiple services for the separated queue system"""
     
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(self, redis_url: str = "redis://localhost:6379", log_dir: str = "logs"):
         self.redis_url = redis_url
         self.services: Dict[str, subprocess.Popen] = {}
+        self.log_files: Dict[str, List] = {}
+        self._stopping = set()  # services being stopped on purpose
         self.running = True
         
+        # Service output goes to files so a chatty child never blocks on a full pipe
+        self.log_dir = log_dir
+        os.makedirs(self.log_dir, exist_ok=True)
+        
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -46,15 +54,18 @@ class ServiceManager:
             logger.info(f"Starting service: {name}")
             logger.info(f"Command: {' '.join(command)}")
             
+            stdout_log = open(self._log_path(name, "stdout"), "ab")
+            stderr_log = open(self._log_path(name, "stderr"), "ab")
+            
             process = subprocess.Popen(
                 command,
                 cwd=cwd or os.getcwd(),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stdout=stdout_log,
+                stderr=stderr_log
             )
             
             self.services[name] = process
+            self.log_files[name] = [stdout_log, stderr_log]
             logger.info(f"Service {name} started with PID {process.pid}")
             return True
             
@@ -62,6 +73,22 @@ class ServiceManager:
             logger.error(f"Failed to start service {name}: {e}")
             return False
     
+    def _log_path(self, name: str, stream: str) -> str:
+        """Path of the log file capturing a service's stdout or stderr"""
+        return os.path.join(self.log_dir, f"{name}.{stream}.log")
+    
+    def _tail_log(self, name: str, stream: str = "stderr", size: int = 500) -> str:
+        """Return the last size bytes of a service log"""
+        with open(self._log_path(name, stream), "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - size))
+            return f.read().decode("utf-8", errors="replace")
+    
+    def _close_logs(self, name: str):
+        """Close the parent's handles on a service's log files"""
+        for log_file in self.log_files.pop(name, []):
+            log_file.close()
+    
     def stop_service(self, name: str) -> bool:
         """Stop a specific service"""
         if name not in self.services:
@@ -70,6 +97,7 @@ class ServiceManager:
         
         try:
             process = self.services[name]
+            self._stopping.add(name)
             if process.poll() is None:  # Process is still running
                 logger.info(f"Stopping service: {name}")
                 process.terminate()
@@ -82,13 +110,16 @@ class ServiceManager:
                     process.kill()
                     process.wait()
             
-            del self.services[name]
+            self.services.pop(name, None)
+            self._close_logs(name)
             logger.info(f"Service {name} stopped")
             return True
             
         except Exception as e:
             logger.error(f"Error stopping service {name}: {e}")
             return False
+        finally:
+            self._stopping.discard(name)
     
     def stop_all_services(self):
         """Stop all running services"""
@@ -121,33 +152,80 @@ class ServiceManager:
         
         return status
     
+    def _handle_service_exit(self, name: str, process: subprocess.Popen):
+        """Report a service that stopped unexpectedly and stop tracking it"""
+        # The SIGCHLD handler can interrupt the monitor's sweep while it is handling
+        # the same exit; whichever gets here second finds the service already gone
+        if self.services.pop(name, None) is None:
+            return
+        logger.error(f"Service {name} has stopped unexpectedly (return code: {process.returncode})")
+        
+        # Get the last few lines of stderr
+        try:
+            stderr_output = self._tail_log(name)
+            if stderr_output:
+                logger.error(f"Service {name} stderr: {stderr_output}")  # Last 500 bytes
+        except:
+            pass
+        
+        self._close_logs(name)
+    
+    def _reap_children(self, signum=None, frame=None):
+        """SIGCHLD handler: reap every exited child and report unexpected exits"""
+        while True:
+            try:
+                pid, wait_status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            
+            for name, process in list(self.services.items()):
+                if process.pid == pid:
+                    # We reaped it, so Popen can no longer read the exit status itself
+                    process.returncode = os.waitstatus_to_exitcode(wait_status)
+                    if name not in self._stopping:
+                        self._handle_service_exit(name, process)
+                    break
+    
     def monitor_services(self):
-        """Monitor services and restart if needed"""
+        """Monitor services and report exits as soon as the kernel signals them"""
         logger.info("Starting service monitoring...")
         
+        signal.signal(signal.SIGCHLD, self._reap_children)
+        # Pick up anything that exited before the handler was installed
+        self._reap_children()
+        
         while self.running:
             try:
+                # Fallback sweep in case a SIGCHLD was coalesced or missed
                 for name, process in list(self.services.items()):
-                    if process.poll() is not None:  # Process has stopped
-                        logger.error(f"Service {name} has stopped unexpectedly (return code: {process.returncode})")
-                        
-                        # Get the last few lines of stderr
-                        try:
-                            stderr_output = process.stderr.read()
-                            if stderr_output:
-                                logger.error(f"Service {name} stderr: {stderr_output[-500:]}")  # Last 500 chars
-                        except:
-                            pass
-                        
-                        # Remove from services list
-                        del self.services[name]
+                    if process.poll() is not None and name not in self._stopping:  # Process has stopped
+                        self._handle_service_exit(name, process)
                 
-                time.sleep(5)  # Check every 5 seconds
+                time.sleep(60)
                 
             except Exception as e:
                 logger.error(f"Error in service monitoring: {e}")
                 time.sleep(5)
     
+    def _wait_ready(self, host: str, port: int, timeout: float = 10, name: Optional[str] = None) -> bool:
+        """Poll a TCP port every 50ms until it accepts connections or timeout expires"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((host, port), timeout=0.1):
+                    return True
+            except OSError:
+                pass
+            
+            # Give up early if the service already died
+            process = self.services.get(name) if name else None
+            if process is not None and process.poll() is not None:
+                return False
+            time.sleep(0.05)
+        return False
+    
     def start_redis_if_needed(self) -> bool:
         """Start Redis if not already running"""
         try:
@@ -173,7 +251,10 @@ class ServiceManager:
             return False
         
         # Wait for Redis to be ready
-        time.sleep(2)
+        redis_url = urlparse(self.redis_url)
+        if not self._wait_ready(redis_url.hostname or "localhost", redis_url.port or 6379, name="redis"):
+            logger.error("Redis did not become ready")
+            return False
         
         # 2. Start Queue HTTP API
         if not self.start_service("queue-api", [
@@ -186,22 +267,22 @@ class ServiceManager:
             return False
         
         # Wait for Queue API to be ready
-        time.sleep(3)
+        if not self._wait_ready("localhost", 8002, timeout=30, name="queue-api"):
+            logger.error("Queue API did not become ready")
+            return False
         
-        # 3. Start Queue Workers
-        for i in range(num_workers):
-            worker_id = f"worker-{i+1}"
-            if not self.start_service(f"queue-worker-{i+1}", [
-                "python", "queue_worker.py",
-                "--redis-url", self.redis_url,
-                "--worker-id", worker_id,
-                "--poll-interval", "1"
-            ]):
-                logger.error(f"Failed to start Queue Worker {i+1}")
-                return False
+        # 3. Start Queue Worker: one process, one model, num_workers task loops
+        if not self.start_service("queue-worker", [
+            "python", "queue_worker.py",
+            "--redis-url", self.redis_url,
+            "--worker-id", "worker-1",
+            "--poll-interval", "1",
+            "--concurrency", str(num_workers)
+        ]):
+            logger.error("Failed to start Queue Worker")
+            return False
         
-        # Wait for workers to be ready
-        time.sleep(2)
+        # Nothing waits on the worker: it only consumes from Redis, which is already up
         
         # 4. Start Main API
         if not self.start_service("main-api", [
@@ -213,6 +294,10 @@ class ServiceManager:
             logger.error("Failed to start Main API")
             return False
         
+        if not self._wait_ready("localhost", 8000, timeout=30, name="main-api"):
+            logger.error("Main API did not become ready")
+            return False
+        
         logger.info("All services started successfully!")
         return True
 
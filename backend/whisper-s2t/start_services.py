@@ -2,26 +2,53 @@
 """
 Service startup script for running transcription services
 """
+import asyncio
+import selectors
 import subprocess
 import sys
 import signal
-import time
 import os
+import socket
+import time
 from pathlib import Path
 
+import aiohttp
+
+# Auto-reload is for development only: its file watcher pins uvicorn to one worker
+RELOAD = os.getenv("SERVICE_RELOAD", "0") == "1"
+# Worker processes for the stateless direct service; each one loads its own model
+WORKERS = int(os.getenv("SERVICE_WORKERS", "1"))
+
+def uvicorn_command(app: str, port: int, workers: int = 1) -> list:
+    """uvicorn invocation for a service, on the uvloop event loop and httptools parser"""
+    command = [
+        "python", "-m", "uvicorn", app,
+        "--host", "0.0.0.0", "--port", str(port),
+        "--loop", "uvloop", "--http", "httptools",
+        "--backlog", "2048"
+    ]
+    if RELOAD:
+        command.append("--reload")
+    elif workers > 1:
+        command += ["--workers", str(workers)]
+    return command
+
 class ServiceManager:
     def __init__(self):
         self.processes = []
+        self.selector = selectors.DefaultSelector()  # epoll on Linux
         self.services = {
             "direct": {
                 "name": "Direct Transcription Service",
-                "command": ["python", "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8001", "--reload"],
+                "command": uvicorn_command("main:app", 8001, workers=WORKERS),
                 "port": 8001,
                 "description": "Direct transcription API without queuing"
             },
             "queue": {
                 "name": "Queue-based Transcription Service", 
-                "command": ["python", "-m", "uvicorn", "main_queue:app", "--host", "0.0.0.0", "--port", "8000", "--reload"],
+                # Single worker: every worker would run its own processing loop, and progress is
+                # only pushed to WebSockets connected to the worker running the task
+                "command": uvicorn_command("main_queue:app", 8000),
                 "port": 8000,
                 "description": "Queue-based transcription API with WebSocket support"
             }
@@ -43,15 +70,29 @@ class ServiceManager:
                 cwd=Path(__file__).parent,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
+                bufsize=-1,
+                start_new_session=True  # own process group, so uvicorn's reload/worker children are signalled with it
             )
             
-            self.processes.append({
+            proc_info = {
                 "name": service_name,
                 "process": process,
-                "service_info": service
-            })
+                "service_info": service,
+                "prefix": f"[{service_name}] ".encode(),
+                "buffer": b"",
+                "pidfd": None
+            }
+            self.processes.append(proc_info)
+            # Reads happen straight on the fd; a spurious wakeup then returns EAGAIN instead of blocking
+            os.set_blocking(process.stdout.fileno(), False)
+            self.selector.register(process.stdout, selectors.EVENT_READ, data=("output", proc_info))
+            
+            # A pidfd becomes readable once, when the child exits (Linux >= 5.3)
+            try:
+                proc_info["pidfd"] = os.pidfd_open(process.pid)
+                self.selector.register(proc_info["pidfd"], selectors.EVENT_READ, data=("exit", proc_info))
+            except (AttributeError, OSError):
+                pass  # fall back to polling this process
             
             print(f"✓ {service['name']} started with PID {process.pid}")
             print(f"  API docs: http://localhost:{service['port']}/docs")
@@ -64,13 +105,64 @@ class ServiceManager:
             print(f"✗ Failed to start {service['name']}: {e}")
             return False
     
+    async def _wait_ready(self, proc_info: dict, timeout: float = 300) -> bool:
+        """Poll a service's /health with exponential backoff until it answers 200"""
+        service = proc_info["service_info"]
+        url = f"http://localhost:{service['port']}/health"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = 0.05
+        
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+            while loop.time() < deadline and proc_info["process"].poll() is None:
+                try:
+                    async with session.get(url) as response:
+                        if response.status == 200:
+                            return True
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pass
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+        return False
+    
+    async def _wait_all_ready(self) -> list:
+        """Wait for every started service to become ready, concurrently"""
+        loop = asyncio.get_running_loop()
+
+        # Keep forwarding output while waiting: startup logs go to the terminal, and a
+        # chatty service cannot fill its pipe and block before it answers /health
+        def forward(proc_info):
+            out = []
+            if not self._drain_output(proc_info, out):
+                loop.remove_reader(proc_info["process"].stdout.fileno())
+            if out:
+                self._write_output(out)
+
+        for proc_info in self.processes:
+            loop.add_reader(proc_info["process"].stdout.fileno(), forward, proc_info)
+        try:
+            return await asyncio.gather(*[
+                self._wait_ready(proc_info) for proc_info in self.processes
+            ])
+        finally:
+            for proc_info in self.processes:
+                loop.remove_reader(proc_info["process"].stdout.fileno())
+    
     def start_all_services(self):
         """Start all services"""
         print("Starting all transcription services...\n")
         
+        # Launch everything at once, then wait on real readiness instead of a fixed sleep each
         for service_name in self.services:
             self.start_service(service_name)
-            time.sleep(2)  # Give each service time to start
+        
+        ready = asyncio.run(self._wait_all_ready())
+        for proc_info, is_ready in zip(self.processes, ready):
+            service = proc_info["service_info"]
+            if is_ready:
+                print(f"✓ {service['name']} is ready")
+            else:
+                print(f"⚠ {service['name']} did not report healthy on port {service['port']}")
         
         if self.processes:
             print("All services started successfully!")
@@ -84,62 +176,162 @@ class ServiceManager:
         """Stop all running services"""
         print("\nStopping all services...")
         
+        # Each service leads its own process group (pgid == pid), so one killpg
+        # reaches the uvicorn parent and any children it spawned
+        for proc_info in self.processes:
+            self._signal_group(proc_info, signal.SIGTERM)
+        
+        deadline = time.monotonic() + 5
         for proc_info in self.processes:
+            name = proc_info["service_info"]["name"]
             try:
-                proc_info["process"].terminate()
-                print(f"✓ Stopped {proc_info['service_info']['name']}")
-            except:
-                try:
-                    proc_info["process"].kill()
-                    print(f"✓ Force stopped {proc_info['service_info']['name']}")
-                except:
-                    print(f"✗ Could not stop {proc_info['service_info']['name']}")
+                proc_info["process"].wait(timeout=max(0, deadline - time.monotonic()))
+                print(f"✓ Stopped {name}")
+            except subprocess.TimeoutExpired:
+                self._signal_group(proc_info, signal.SIGKILL)
+                proc_info["process"].wait()
+                print(f"✓ Force stopped {name}")
         
         print("All services stopped.")
     
+    def _signal_group(self, proc_info, signum):
+        """Send a signal to a service's whole process group"""
+        try:
+            os.killpg(proc_info["process"].pid, signum)
+        except ProcessLookupError:
+            pass  # the group has already exited
+    
+    def _drain_output(self, proc_info, out: list, until_blocked: bool = False) -> bool:
+        """Collect whatever a service has written, prefixed per line, into out.
+        
+        One read per call, or with until_blocked every read the pipe can serve
+        without waiting. Returns False once the service's output pipe reaches EOF.
+        """
+        stdout = proc_info["process"].stdout
+        while True:
+            try:
+                data = os.read(stdout.fileno(), 65536)
+            except BlockingIOError:
+                return True
+            
+            if not data:
+                if proc_info["buffer"]:
+                    out.append(proc_info["prefix"] + proc_info["buffer"] + b"\n")
+                    proc_info["buffer"] = b""
+                self.selector.unregister(stdout)
+                return False
+            
+            *lines, proc_info["buffer"] = (proc_info["buffer"] + data).split(b"\n")
+            if lines:
+                prefix = proc_info["prefix"]
+                out.append(b"".join(prefix + line.rstrip(b"\r") + b"\n" for line in lines))
+            if not until_blocked:
+                return True
+    
+    def _output_open(self, proc_info=None) -> bool:
+        """Whether a service's output pipe is still registered, i.e. not yet at EOF.
+        
+        With no service given, whether any service's pipe still is.
+        """
+        if proc_info is not None:
+            return self.selector.get_map().get(proc_info["process"].stdout) is not None
+        return any(key.data[0] == "output" for key in self.selector.get_map().values())
+    
+    def _write_output(self, chunks: list):
+        """Write the output collected in one selector tick with a single writev"""
+        sys.stdout.flush()  # keep our own print() output ordered with the raw writes
+        fd = sys.stdout.fileno()
+        while chunks:
+            written = os.writev(fd, chunks)
+            # Drop what was fully written and retry the remainder of a partial write
+            index = 0
+            while index < len(chunks) and written >= len(chunks[index]):
+                written -= len(chunks[index])
+                index += 1
+            chunks = chunks[index:]
+            if written:
+                chunks[0] = chunks[0][written:]
+    
+    def _service_stopped(self, proc_info, out: list):
+        """Reap a service that exited and stop tracking it.
+        
+        Whatever it wrote before exiting is collected and printed first, so the
+        stop notice follows its last lines even if their event comes later.
+        """
+        if self._output_open(proc_info):
+            self._drain_output(proc_info, out, until_blocked=True)
+        if out:
+            self._write_output(out)
+            out.clear()
+        process = proc_info["process"]
+        process.wait()
+        if proc_info["pidfd"] is not None:
+            self.selector.unregister(proc_info["pidfd"])
+            os.close(proc_info["pidfd"])
+            proc_info["pidfd"] = None
+        print(f"⚠ {proc_info['service_info']['name']} has stopped (exit code: {process.returncode})")
+        self.processes.remove(proc_info)
+    
+    def _reap_polled(self, out: list):
+        """Check the services that have no pidfd for exits"""
+        for proc_info in [proc_info for proc_info in self.processes if proc_info["pidfd"] is None]:
+            if proc_info["process"].poll() is not None:
+                self._service_stopped(proc_info, out)
+    
     def monitor_services(self):
         """Monitor running services and handle shutdown gracefully"""
-        def signal_handler(signum, frame):
-            print(f"\nReceived signal {signum}")
-            self.stop_all_services()
-            sys.exit(0)
-        
-        # Register signal handlers
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        # Signals arrive as bytes on a socket watched by the selector, the same way
+        # asyncio delivers them, so shutdown runs from the loop rather than from inside
+        # an interrupted select() and child exits wake it without a polling timeout
+        wakeup_r, wakeup_w = socket.socketpair()
+        wakeup_r.setblocking(False)
+        wakeup_w.setblocking(False)
+        signal.set_wakeup_fd(wakeup_w.fileno())
+        self.selector.register(wakeup_r, selectors.EVENT_READ, data=("signal", None))
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+            signal.signal(signum, lambda signum, frame: None)
         
         print("Monitoring services... Press Ctrl+C to stop all services.")
         print("Logs will be displayed below:\n")
         
         try:
-            while True:
-                # Check if any process has died
-                for proc_info in self.processes[:]:  # Copy list to avoid modification during iteration
-                    process = proc_info["process"]
-                    if process.poll() is not None:
-                        print(f"⚠ {proc_info['service_info']['name']} has stopped (exit code: {process.returncode})")
-                        self.processes.remove(proc_info)
-                
-                # If all processes have died, exit
-                if not self.processes:
-                    print("All services have stopped.")
-                    break
-                
-                # Display output from processes
-                for proc_info in self.processes:
-                    process = proc_info["process"]
+            self._reap_polled([])  # exits from before the SIGCHLD handler was installed
+            # A stopped service's output stays registered until its pipe hits EOF, so
+            # keep going until every service has exited and every pipe is drained
+            while self.processes or self._output_open():
+                # Block until a service writes output or exits, or a signal arrives
+                out = []
+                for key, _ in self.selector.select():
+                    kind, proc_info = key.data
                     try:
-                        # Non-blocking read
-                        output = process.stdout.readline()
-                        if output:
-                            print(f"[{proc_info['name']}] {output.strip()}")
+                        if kind == "signal":
+                            signums = set(wakeup_r.recv(64))
+                            if signums & {signal.SIGINT, signal.SIGTERM}:
+                                if out:
+                                    self._write_output(out)
+                                print(f"\nReceived signal {max(signums - {signal.SIGCHLD})}")
+                                self.stop_all_services()
+                                return
+                            self._reap_polled(out)
+                        elif kind == "exit":
+                            self._service_stopped(proc_info, out)
+                        elif self._output_open(proc_info):  # not already drained to EOF this tick
+                            self._drain_output(proc_info, out)
                     except:
                         pass
-                
-                time.sleep(0.1)
-                
+                if out:
+                    self._write_output(out)
+            
+            # If all processes have died, exit
+            print("All services have stopped.")
+            
         except KeyboardInterrupt:
             self.stop_all_services()
+        finally:
+            signal.set_wakeup_fd(-1)
+            self.selector.unregister(wakeup_r)
+            wakeup_r.close()
+            wakeup_w.close()
 
 def main():
     if len(sys.argv) < 2:
@@ -155,16 +347,23 @@ def main():
     manager = ServiceManager()
     command = sys.argv[1].lower()
     
-    if command == "all":
-        manager.start_all_services()
-        manager.monitor_services()
-    elif command in manager.services:
-        manager.start_service(command)
-        manager.monitor_services()
-    else:
+    if command not in manager.services and command != "all":
         print(f"Unknown command: {command}")
         print("Available commands: direct, queue, all")
         sys.exit(1)
+    
+    # The services run in their own sessions and never see the terminal's Ctrl+C, so an
+    # interrupt before monitoring takes over the signals (e.g. while waiting on readiness)
+    # has to stop them here
+    try:
+        if command == "all":
+            manager.start_all_services()
+        else:
+            manager.start_service(command)
+    except KeyboardInterrupt:
+        manager.stop_all_services()
+        return
+    manager.monitor_services()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
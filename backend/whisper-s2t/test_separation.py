@@ -2,11 +2,22 @@
 """
 Test script to verify the separated transcription architecture
 """
+import os
 import sys
+import types
 import importlib.util
 
+# Quiet the tokenizer fork-safety probe and advisory warnings for every import below
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+os.environ.setdefault("TRANSFORMERS_NO_ADVISORY_WARNINGS", "1")
+
 def test_import(module_name, file_path):
     """Test if a module can be imported successfully"""
+    # Modules already pulled in by an earlier test (directly or as a dependency) are reused
+    if module_name in sys.modules:
+        print(f"✓ {module_name}: Import successful (cached)")
+        return True, sys.modules[module_name]
+    
     try:
         spec = importlib.util.spec_from_file_location(module_name, file_path)
         module = importlib.util.module_from_spec(spec)
@@ -28,8 +39,9 @@ def test_transcription_service():
     
     try:
         # Test that we can create the service instance
-        service = module.TranscriptionService()
-        print(f"✓ TranscriptionService: Instance created")
+        service = module.get_service()
+        assert service is module.get_service()
+        print(f"✓ TranscriptionService: Shared instance created")
         
         # Test model info method
         info = service.get_model_info()
@@ -40,6 +52,47 @@ def test_transcription_service():
         print(f"✗ TranscriptionService: {e}")
         return False
 
+def test_chunk_processing():
+    """Drive one chunk through ChunkProcessor with a fake whisper backend"""
+    print("\n=== Testing Chunk Processing ===")
+    
+    success, module = test_import("transcription_service", "transcription_service.py")
+    if not success:
+        return False
+    
+    calls = []
+    
+    def fake_transcribe(model, audio, language, **options):
+        calls.append((model, len(audio), language))
+        return {
+            "text": "test",
+            "segments": [{"start": 0.5, "end": 1.0, "text": "test", "words": [{"text": "test", "start": 0.5, "end": 1.0}]}],
+            "language": language
+        }
+    
+    real_whisper = module.whisper
+    module.whisper = types.SimpleNamespace(transcribe=fake_transcribe)
+    try:
+        import numpy as np
+        fake_model = object()
+        processor = module.ChunkProcessor(fake_model)
+        audio = (0.5 * np.sin(2 * np.pi * 440 * np.arange(2 * module.SAMPLE_RATE) / module.SAMPLE_RATE)).astype(np.float32)
+        chunk_info = {"chunk_id": 0, "start_ms": 10000, "end_ms": 12000, "start_time": 10.0, "duration": 2.0}
+        
+        chunk_result = processor.process_single_chunk(audio, chunk_info, "th")
+        segment = chunk_result["result"]["segments"][0]
+        assert calls == [(fake_model, len(audio), "th")], calls
+        assert (segment["start"], segment["end"]) == (10.5, 11.0), segment
+        assert segment["words"][0]["start"] == 10.5, segment
+        print(f"✓ ChunkProcessor: Chunk transcribed and shifted to its offset")
+        
+        return True
+    except Exception as e:
+        print(f"✗ ChunkProcessor: {e}")
+        return False
+    finally:
+        module.whisper = real_whisper
+
 def test_queue_processor():
     """Test the queue processor module"""
     print("\n=== Testing Queue Processor ===")
@@ -106,8 +159,10 @@ def main():
     print("Testing Separated Transcription Architecture")
     print("=" * 50)
     
+    # Leaf modules first so the apps reuse them from sys.modules
     tests = [
         test_transcription_service,
+        test_chunk_processing,
         test_queue_processor,
         test_direct_service,
         test_queue_service
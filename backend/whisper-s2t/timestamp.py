@@ -1,22 +1,103 @@
-import whisper_timestamped as whisper
+from faster_whisper import WhisperModel
+import hashlib
 import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import torch
 
-audio = whisper.load_audio("A.mp3")
+from transcription_service import VAD_PARAMETERS, faster_whisper_result
 
-model = whisper.load_model("turbo", device="cpu")
+SAMPLE_RATE = 16000
+PCM_CACHE_DIR = Path(".pcm_cache")
 
-result = whisper.transcribe(model, audio, language="th")
+def pcm_cache_path(path):
+    """Cache file for the decoded PCM of path, keyed by its name, size and mtime"""
+    stat = os.stat(path)
+    key = hashlib.blake2b(
+        f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=8
+    ).hexdigest()
+    return PCM_CACHE_DIR / f"{key}.s16le"
 
-# Save the JSON result to a file
+def decode_pcm(path):
+    """int16 mono 16 kHz samples of path, mapped from the cache.
+
+    A fresh decode is streamed from ffmpeg straight into the cache file, so the
+    samples are never held in a bytes object and later runs skip ffmpeg. Only the
+    latest decode is kept, so the cache holds one file's PCM at most.
+    """
+    cache = pcm_cache_path(path)
+    if not cache.exists():
+        PCM_CACHE_DIR.mkdir(exist_ok=True)
+        partial = cache.with_suffix(".part")
+        try:
+            with open(partial, "wb") as cache_file:
+                subprocess.run(
+                    ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", path,
+                     "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+                    stdout=cache_file, check=True
+                )
+            partial.replace(cache)
+        finally:
+            partial.unlink(missing_ok=True)
+        # Keep the cache to the current decode: entries for older inputs, or for
+        # this one before it changed, are never read again
+        for stale in PCM_CACHE_DIR.glob("*.s16le"):
+            if stale != cache:
+                stale.unlink(missing_ok=True)
+
+    if not cache.stat().st_size:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(cache, dtype=np.int16, mode="r")
+
+def load_pcm(path):
+    """float32 mono 16 kHz audio of path in [-1, 1), as whisper.load_audio would return it.
+
+    The whole file is converted at once, since the model takes it in one call.
+    """
+    pcm = decode_pcm(path)
+    return np.multiply(pcm, 1 / 32768.0, dtype=np.float32)
+
+# Use the GPU when there is one; CTranslate2 runs int8 GEMMs on CPU and fp16 on CUDA
+device = "cuda" if torch.cuda.is_available() else "cpu"
+compute_type = "float16" if device == "cuda" else "int8"
+
+# Decode the audio (ffmpeg, or the cache) while the model weights load; both release the GIL
+with ThreadPoolExecutor(max_workers=2) as executor:
+    audio_future = executor.submit(load_pcm, "A.mp3")
+    model_future = executor.submit(WhisperModel, "large-v3-turbo", device=device, compute_type=compute_type)
+    audio, model = audio_future.result(), model_future.result()
+
+# Transcribe the whole file in one call: the model does its own 30 s windowing and
+# seeks from where each window's last segment ended, so no words are cut at fixed
+# boundaries; the VAD filter keeps silent stretches away from the decoder
+fw_segments, info = model.transcribe(
+    audio, language="th", task="transcribe", word_timestamps=True,
+    vad_filter=True, vad_parameters=dict(VAD_PARAMETERS),
+    condition_on_previous_text=False, compression_ratio_threshold=2.4,
+    log_prob_threshold=-1.0, no_speech_threshold=0.6
+)
+segments = faster_whisper_result(fw_segments, info)["segments"]
+
+result = {
+    "text": "".join(segment["text"] for segment in segments),
+    "segments": segments,
+    "language": "th"
+}
+
+# Save the JSON result to a file; compact, since save_transcript is the reader
 with open("transcript_result.json", "w", encoding="utf-8") as f:
-    json.dump(result, f, indent=2, ensure_ascii=False)
+    json.dump(result, f, separators=(",", ":"), ensure_ascii=False)
 
 print("Saved transcript result to transcript_result.json")
 
-# Print the result
-print(json.dumps(result, indent=2, ensure_ascii=False))
+# Print the result, streamed by the encoder rather than built as one string
+json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+print()
 
 # Import and run the save_to_csv script
-from save_transcript import save_segments_to_csv, save_words_to_csv
-save_segments_to_csv(result)
-save_words_to_csv(result)
\ No newline at end of file
+from save_transcript import save_both
+save_both(result)
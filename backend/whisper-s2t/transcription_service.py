@@ -2,16 +2,29 @@
 Core transcription service module - separated from queue processing
 """
 import os
+import io
+import subprocess
 import tempfile
-import gc
-from typing import Dict, Any, Optional
+import functools
+import bisect
+import atexit
+import threading
+import wave
+import logging
+from typing import Callable, Dict, Any, Optional
 import whisper_timestamped as whisper
+import whisper as basic_whisper
 from pydub import AudioSegment
 from pydub.silence import detect_silence
 import numpy as np
 from datetime import datetime
 import csv
-import mimetypes
+import torch
+
+try:
+    from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+except ImportError:  # whisper_timestamped backend only
+    BatchedInferencePipeline = WhisperModel = decode_audio = None
 
 # Configuration for large file processing
 FILE_SIZE_THRESHOLD = 20 * 1024 * 1024  # 20MB threshold
@@ -21,120 +34,407 @@ MIN_CHUNK_DURATION = 60      # 1 minute minimum
 OVERLAP_DURATION = 5         # 5 seconds overlap between chunks
 SILENCE_THRESHOLD = -40      # dB threshold for silence detection
 MIN_SILENCE_LEN = 1000       # Minimum silence length in ms
+SAMPLE_RATE = 16000          # Whisper's input rate
+N_FRAMES = 3000              # mel frames in one 30s Whisper window
+EMPTY_CACHE_EVERY = 4        # chunks between returning cached CUDA blocks to the driver
+SILENT_CHUNK_DBFS = -55      # chunks whose loudest 30 ms frame is below this are not transcribed
+
+# Inference backend: "faster-whisper" (CTranslate2, int8 weights) or "whisper-timestamped"
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "faster-whisper")
+WHISPER_MODEL_NAME = "large"
+# 30s speech windows the faster-whisper encoder runs per forward pass
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+# Transcriptions one faster-whisper model runs at once; on CPU the cores are split between them
+WHISPER_WORKERS = max(1, int(os.getenv("WHISPER_WORKERS", "1")))
+# CTranslate2 compute type for faster-whisper ("int8", "int8_float16", "float16", ...); empty picks per device
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE") or None
+# torch.compile the whisper_timestamped encoder on CUDA (CUDA graphs); costs a compile at startup
+WHISPER_TORCH_COMPILE = os.getenv("WHISPER_TORCH_COMPILE", "0") == "1"
+# Retry a failed whisper_timestamped transcription with plain openai-whisper (no word timestamps)
+WHISPER_BASIC_FALLBACK = os.getenv("WHISPER_BASIC_FALLBACK", "0") == "1"
+
+# Silero VAD settings for faster-whisper: pauses of 500 ms split speech, padded by 200 ms each side
+VAD_PARAMETERS = {"threshold": 0.5, "min_silence_duration_ms": 500, "speech_pad_ms": 200}
+
+# whisper_timestamped transcribe options understood by faster-whisper, and their names there
+FASTER_WHISPER_OPTIONS = {
+    "temperature": "temperature",
+    "condition_on_previous_text": "condition_on_previous_text",
+    "compression_ratio_threshold": "compression_ratio_threshold",
+    "logprob_threshold": "log_prob_threshold",
+    "no_speech_threshold": "no_speech_threshold",
+}
+
+logger = logging.getLogger(__name__)
 
 LOG_FILE_PATH = "event_log.csv"
 LOG_HEADER = ["timestamp", "event_type", "status", "details"]
 
+LOG_FLUSH_EVERY = 32  # events buffered before they are written out
+
+# Per-thread float32 buffers that decoded samples are written into, see sample_buffer()
+_thread_buffers = threading.local()
+
+_log_lock = threading.Lock()
+_log_file = None
+_log_writer = None
+_log_pending = 0
+
+def _open_log():
+    """Open the CSV log once for appending; the header is written only to a new file"""
+    global _log_file, _log_writer
+    is_new = not os.path.isfile(LOG_FILE_PATH) or os.path.getsize(LOG_FILE_PATH) == 0
+    _log_file = open(LOG_FILE_PATH, 'a', newline='', encoding='utf-8', buffering=64 * 1024)
+    _log_writer = csv.writer(_log_file)
+    if is_new:
+        _log_writer.writerow(LOG_HEADER)
+    atexit.register(_log_file.close)
+
 def log_event(event_type: str, status: str, details: str):
     """Appends an event to the CSV log file."""
+    global _log_pending
     timestamp = datetime.now().isoformat()
-    log_entry = {"timestamp": timestamp, "event_type": event_type, "status": status, "details": details}
     
-    file_exists = os.path.isfile(LOG_FILE_PATH)
+    try:
+        with _log_lock:
+            if _log_file is None:
+                _open_log()
+            _log_writer.writerow([timestamp, event_type, status, details])
+            _log_pending += 1
+            if _log_pending >= LOG_FLUSH_EVERY or status in ("FAILURE", "ERROR"):
+                _log_file.flush()
+                _log_pending = 0
+    except Exception as e:
+        logger.error("Failed to write to log file %s: %s", LOG_FILE_PATH, e)
+
+def faster_whisper_result(segments, info, progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    """Convert faster-whisper output to the whisper_timestamped result layout.
+    
+    segments is decoded lazily, so progress_callback is told how far into the audio
+    each segment ends as it arrives.
+    """
+    result_segments = []
+    for segment_id, segment in enumerate(segments):
+        if progress_callback is not None and info.duration:
+            progress_callback(min(1.0, segment.end / info.duration))
+        result_segments.append({
+            "id": segment_id,
+            "seek": segment.seek,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": segment.tokens,
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob,
+            "confidence": float(np.exp(segment.avg_logprob)),
+            "words": [
+                {
+                    "text": word.word.strip(),
+                    "start": word.start,
+                    "end": word.end,
+                    "confidence": word.probability
+                }
+                for word in segment.words or []
+            ]
+        })
+    
+    return {
+        "text": "".join(segment["text"] for segment in result_segments),
+        "segments": result_segments,
+        "language": info.language
+    }
+
+def detect_silence_ranges(samples: np.ndarray, frame_rate: int, min_silence_len: int,
+                          silence_thresh: float, block_ms: int = 600_000) -> list[list[int]]:
+    """NumPy equivalent of pydub.silence.detect_silence with seek_step=1 for int16 mono samples.
+
+    Window energies come from a cumulative sum of per-millisecond sums of squares, so each
+    window costs O(1) instead of a fresh RMS over min_silence_len ms of audio.
+    """
+    samples_per_ms = frame_rate // 1000
+    n_ms = len(samples) // samples_per_ms
+    if n_ms < min_silence_len:
+        return []
+    
+    # Exact integer energy per millisecond, squared in blocks to bound the int64 temporaries
+    frames = samples[:n_ms * samples_per_ms].reshape(n_ms, samples_per_ms)
+    energy = np.zeros(n_ms + 1, dtype=np.int64)
+    for start in range(0, n_ms, block_ms):
+        block = frames[start:start + block_ms].astype(np.int64)
+        energy[start + 1:start + 1 + len(block)] = np.einsum("ij,ij->i", block, block)
+    np.cumsum(energy, out=energy)
+    
+    # Same test as pydub: integer RMS of the window against the threshold amplitude
+    window_energy = energy[min_silence_len:] - energy[:-min_silence_len]
+    rms = np.floor(np.sqrt(window_energy / (min_silence_len * samples_per_ms)))
+    threshold = 10 ** (silence_thresh / 20) * 32768
+    silent_starts = np.flatnonzero(rms <= threshold)
+    if not len(silent_starts):
+        return []
+    
+    # Silent windows closer than min_silence_len apart join one range, as in pydub
+    gaps = np.flatnonzero(np.diff(silent_starts) > min_silence_len)
+    range_starts = silent_starts[np.concatenate(([0], gaps + 1))]
+    range_ends = silent_starts[np.concatenate((gaps, [len(silent_starts) - 1]))] + min_silence_len
+    return np.stack((range_starts, range_ends), axis=1).tolist()
+
+def sample_buffer(length: int) -> np.ndarray:
+    """A float32 sample buffer holding at least length samples.
+    
+    Up to a chunk's worth, this is the thread's reusable buffer; concurrent
+    transcriptions run on separate threads, so each gets its own. Longer audio
+    gets a fresh array that is not kept, so one long file does not pin a
+    file-sized buffer on a pool thread for the life of the process.
+    """
+    limit = MAX_CHUNK_DURATION * SAMPLE_RATE
+    if length > limit:
+        return np.empty(length, dtype=np.float32)
+    buffer = getattr(_thread_buffers, "samples", None)
+    if buffer is None:
+        buffer = np.empty(limit, dtype=np.float32)
+        _thread_buffers.samples = buffer
+    return buffer
+
+def read_pcm_wav(path: str) -> np.ndarray:
+    """Read a 16 kHz mono 16-bit WAV as float32 in [-1, 1), as whisper.load_audio would return it.
+    
+    For chunk-sized files the samples are a view of this thread's sample buffer, so
+    they must be consumed before the thread reads more audio. The PCM data is memory-mapped and converted
+    from the page cache, with no intermediate copy of the file's bytes.
+    """
+    with open(path, "rb") as f, wave.open(f) as wav_file:
+        if (wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate()) != (1, 2, SAMPLE_RATE):
+            raise ValueError(f"{path} is not 16 kHz mono 16-bit PCM")
+        n_frames = wav_file.getnframes()
+        data_offset = f.tell()  # wave stops right after the data chunk's header
+    out = sample_buffer(n_frames)[:n_frames]
+    if n_frames:
+        frames = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(n_frames,))
+        np.multiply(frames, 1 / 32768.0, out=out)
+        del frames
+    return out
+
+def pcm_wav_duration(path: str) -> Optional[float]:
+    """Duration in seconds of a 16 kHz mono 16-bit WAV, read from its header; None for any other file"""
+    try:
+        with wave.open(path, "rb") as wav_file:
+            if (wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate()) != (1, 2, SAMPLE_RATE):
+                return None
+            return wav_file.getnframes() / SAMPLE_RATE
+    except (wave.Error, EOFError):
+        return None
+
+def peak_frame_dbfs(audio: np.ndarray, frame_len: int = SAMPLE_RATE * 30 // 1000) -> float:
+    """Level in dBFS of the loudest frame of float audio, 30 ms frames by default"""
+    padded_len = -(-len(audio) // frame_len) * frame_len
+    frames = np.zeros(padded_len, dtype=np.float32)
+    frames[:len(audio)] = audio
+    frames = frames.reshape(-1, frame_len)
+    peak_power = np.einsum("ij,ij->i", frames, frames).max() / frame_len
+    return 10 * np.log10(peak_power + 1e-20)
+
+def quantize_whisper_linear(model):
+    """Return model with its Linear layers quantized to dynamic int8 for CPU decoding.
+    
+    whisper's Linear is its own nn.Linear subclass, so it is named in the spec and
+    mapping. The quantized copy must survive a short transcription with
+    whisper_timestamped's attention hooks, otherwise the fp32 model is kept.
+    """
+    from whisper.model import Linear as WhisperLinear
+    try:
+        quantized = torch.quantization.quantize_dynamic(
+            model,
+            {torch.nn.Linear, WhisperLinear},
+            dtype=torch.qint8,
+            mapping={
+                torch.nn.Linear: torch.ao.nn.quantized.dynamic.Linear,
+                WhisperLinear: torch.ao.nn.quantized.dynamic.Linear,
+            },
+        )
+        whisper.transcribe(quantized, np.zeros(SAMPLE_RATE, dtype=np.float32), language="th", vad=False)
+    except Exception as e:
+        logger.warning("int8 quantization failed, keeping fp32 weights: %s", e)
+        return model
+    logger.info("Quantized Whisper Linear layers to int8")
+    return quantized
+
+@functools.lru_cache(maxsize=1)
+def batched_pipeline(model) -> "BatchedInferencePipeline":
+    """The batched faster-whisper pipeline over model, built once and reused for every call"""
+    return BatchedInferencePipeline(model=model)
+
+def compile_whisper_encoder(model):
+    """Compile model's encoder with CUDA graphs, warmed up so no request pays the compile.
     
+    Only the encoder is compiled: its input is always one padded 30s mel, so the graph is
+    captured once, while the decoder's growing KV cache and whisper_timestamped's
+    cross-attention hooks would make dynamo recompile on every step.
+    """
     try:
-        with open(LOG_FILE_PATH, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=LOG_HEADER)
-            if not file_exists or os.path.getsize(LOG_FILE_PATH) == 0:
-                writer.writeheader()
-            writer.writerow(log_entry)
+        import torch._dynamo
+        import torch._inductor.config
+        torch._inductor.config.coordinate_descent_tuning = True
+        torch._inductor.config.fx_graph_cache = True
+        torch._dynamo.config.cache_size_limit = 32
+        encoder = torch.compile(model.encoder, mode="reduce-overhead", fullgraph=False)
+        mel = torch.zeros(
+            1, model.dims.n_mels, N_FRAMES, device=model.device, dtype=next(model.parameters()).dtype
+        )
+        with torch.no_grad():
+            for _ in range(3):  # CUDA graphs are recorded after the first warm runs
+                encoder(mel)
     except Exception as e:
-        print(f"Failed to write to log file {LOG_FILE_PATH}: {e}")
+        logger.warning("torch.compile failed, keeping the eager encoder: %s", e)
+        return model
+    model.encoder = encoder
+    logger.info("Compiled Whisper encoder with CUDA graphs")
+    return model
+
+def transcribe_with_model(model, audio, language: str,
+                          progress_callback: Optional[Callable[[float], None]] = None, **options) -> Dict[str, Any]:
+    """Transcribe with whichever backend loaded the model; always returns a whisper_timestamped style result"""
+    if WhisperModel is not None and isinstance(model, WhisperModel):
+        fw_options = {
+            FASTER_WHISPER_OPTIONS[key]: value
+            for key, value in options.items()
+            if key in FASTER_WHISPER_OPTIONS
+        }
+        # VAD cuts the audio into <=30s speech windows, which are padded and encoded
+        # WHISPER_BATCH_SIZE at a time instead of one window per forward pass; silence
+        # between them never reaches the decoder
+        segments, info = batched_pipeline(model).transcribe(
+            audio, language=language, task="transcribe", word_timestamps=True,
+            batch_size=WHISPER_BATCH_SIZE, vad_filter=True, vad_parameters=dict(VAD_PARAMETERS),
+            **fw_options
+        )
+        return faster_whisper_result(segments, info, progress_callback)
+    
+    # The language is always known, so no detection pass; disfluency and VAD passes stay off
+    options.setdefault("detect_disfluencies", False)
+    options.setdefault("vad", False)
+    return whisper.transcribe(model, audio, language=language, task="transcribe", **options)
 
 def preprocess_audio_file(file_path: str) -> str:
     """Preprocess audio file to ensure compatibility with Whisper"""
     try:
-        from pydub import AudioSegment
-        import tempfile
-        
-        print(f"Preprocessing audio file: {file_path}")
+        logger.info("Preprocessing audio file: %s", file_path)
         
-        # Load with pydub to normalize format
-        audio = AudioSegment.from_file(file_path)
-        
-        # Check if audio has content
-        if len(audio) == 0:
-            raise Exception("Audio file has no content")
-        
-        # Normalize to common format that Whisper likes
-        audio = audio.set_frame_rate(16000).set_channels(1)
-        
-        # Create a new normalized file
+        # One ffmpeg pass decodes and writes the 16 kHz mono 16-bit WAV Whisper likes,
+        # instead of decoding through pydub and running ffmpeg again to export
         normalized_path = file_path + "_normalized.wav"
-        audio.export(
-            normalized_path,
-            format="wav",
-            parameters=["-ar", "16000", "-ac", "1"]
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-threads", "0", "-i", file_path,
+             "-ar", str(SAMPLE_RATE), "-ac", "1", "-acodec", "pcm_s16le", normalized_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
         )
         
-        print(f"Audio preprocessing complete: {normalized_path}")
+        # Check if audio has content
+        with wave.open(normalized_path, "rb") as wav:
+            if wav.getnframes() == 0:
+                os.remove(normalized_path)
+                raise Exception("Audio file has no content")
+        
+        logger.info("Audio preprocessing complete: %s", normalized_path)
         return normalized_path
         
+    except subprocess.CalledProcessError as e:
+        if os.path.exists(normalized_path):
+            os.remove(normalized_path)
+        logger.error("Audio preprocessing failed: %s", e.stderr.decode(errors='replace').strip())
+        return file_path  # Return original path if preprocessing fails
     except Exception as e:
-        print(f"Audio preprocessing failed: {e}")
+        logger.error("Audio preprocessing failed: %s", e)
         return file_path  # Return original path if preprocessing fails
 
+# Common audio formats supported by Whisper
+SUPPORTED_EXTENSIONS = frozenset({'mp3', 'wav', 'flac', 'm4a', 'aac', 'ogg', 'wma', 'mp4'})
+
 def validate_audio_file(file_path: str) -> bool:
     """Validate that the file is a supported audio format"""
     try:
-        # Check file extension and MIME type
-        mime_type, _ = mimetypes.guess_type(file_path)
-        
-        # Common audio formats supported by Whisper
-        supported_formats = [
-            '.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma', '.mp4'
-        ]
-        
-        supported_mimes = [
-            'audio/mpeg', 'audio/wav', 'audio/flac', 'audio/mp4', 
-            'audio/aac', 'audio/ogg', 'audio/x-ms-wma', 'video/mp4'
-        ]
-        
-        file_ext = os.path.splitext(file_path)[1].lower()
+        file_ext = file_path.rpartition('.')[2].lower()
         
         # Check extension
-        if file_ext not in supported_formats:
-            print(f"Unsupported file extension: {file_ext}")
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            logger.error("Unsupported file extension: %s", file_ext)
             return False
         
-        # Check MIME type if available
-        if mime_type and mime_type not in supported_mimes:
-            print(f"Warning: MIME type {mime_type} might not be supported")
-        
-        # Check if file is readable
+        # Check the file is readable and not truncated to nothing; whether it actually
+        # decodes is settled by the decode that follows in preprocessing
         try:
-            with open(file_path, 'rb') as f:
-                # Read first few bytes to ensure file is not corrupted
-                header = f.read(16)
-                if len(header) < 4:
-                    print("File appears to be too small or corrupted")
-                    return False
-        except Exception as e:
-            print(f"Cannot read file: {e}")
+            if os.stat(file_path).st_size < 4:
+                logger.error("File appears to be too small or corrupted")
+                return False
+            if not os.access(file_path, os.R_OK):
+                logger.error("Cannot read file: %s", file_path)
+                return False
+        except OSError as e:
+            logger.error("Cannot read file: %s", e)
             return False
         
         return True
         
     except Exception as e:
-        print(f"Error validating audio file: {e}")
+        logger.error("Error validating audio file: %s", e)
         return False
 
 class ChunkProcessor:
     """Handles intelligent audio chunking and processing."""
     
-    def __init__(self, model, temp_dir: str):
+    # Decode options shared by every chunk; only the language varies per call
+    _DECODE_KWARGS = dict(
+        remove_punctuation_from_words=False,
+        include_punctuation_in_confidence=True,
+        refine_whisper_precision=0.5,
+        min_word_duration=0.1,
+        plot_word_alignment=False,
+        word_alignment_most_top_layers=None,
+        remove_empty_words=True,
+        temperature=0.0,
+        condition_on_previous_text=False,
+        compression_ratio_threshold=2.4,
+        logprob_threshold=-1.0,
+        no_speech_threshold=0.6
+    )
+    
+    def __init__(self, model):
         self.model = model
-        self.temp_dir = temp_dir
         self.processed_chunks = []
+        self._audio = None
+        self._audio_path = None
+    
+    def _load(self, audio_path: str) -> AudioSegment:
+        """Decode audio_path once as 16 kHz mono; every chunking step slices this copy."""
+        if self._audio is None or self._audio_path != audio_path:
+            self._audio = (
+                AudioSegment.from_file(audio_path)
+                .set_frame_rate(SAMPLE_RATE)
+                .set_channels(1)
+                .set_sample_width(2)
+            )
+            self._audio_path = audio_path
+        return self._audio
         
     def detect_natural_breaks(self, audio: AudioSegment) -> list[int]:
         """Detect natural breaks (silence) in audio for smart chunking."""
         try:
-            silence_ranges = detect_silence(
-                audio, 
-                min_silence_len=MIN_SILENCE_LEN,
-                silence_thresh=SILENCE_THRESHOLD
-            )
+            if audio.sample_width == 2 and audio.channels == 1:
+                silence_ranges = detect_silence_ranges(
+                    np.frombuffer(audio.raw_data, dtype=np.int16),
+                    audio.frame_rate,
+                    min_silence_len=MIN_SILENCE_LEN,
+                    silence_thresh=SILENCE_THRESHOLD
+                )
+            else:
+                silence_ranges = detect_silence(
+                    audio, 
+                    min_silence_len=MIN_SILENCE_LEN,
+                    silence_thresh=SILENCE_THRESHOLD
+                )
             
             break_points = []
             for start, end in silence_ranges:
@@ -143,17 +443,22 @@ class ChunkProcessor:
             
             return break_points
         except Exception as e:
-            print(f"Error detecting natural breaks: {e}")
+            logger.error("Error detecting natural breaks: %s", e)
             return []
     
     def create_smart_chunks(self, audio_path: str) -> list[Dict[str, Any]]:
         """Create smart chunks based on natural breaks and optimal duration."""
         try:
-            audio = AudioSegment.from_file(audio_path)
-            total_duration_ms = len(audio)
-            total_duration_s = total_duration_ms / 1000
+            # A normalized WAV's length is in its header, so short files are never decoded here
+            header_duration_s = pcm_wav_duration(audio_path)
+            if header_duration_s is not None:
+                total_duration_s = header_duration_s
+                total_duration_ms = round(total_duration_s * 1000)
+            else:
+                total_duration_ms = len(self._load(audio_path))
+                total_duration_s = total_duration_ms / 1000
             
-            print(f"Total audio duration: {total_duration_s:.2f} seconds")
+            logger.info("Total audio duration: %.2f seconds", total_duration_s)
             
             if total_duration_s <= OPTIMAL_CHUNK_DURATION:
                 return [{
@@ -161,9 +466,12 @@ class ChunkProcessor:
                     "end_ms": total_duration_ms,
                     "start_time": 0.0,
                     "duration": total_duration_s,
-                    "chunk_id": 0
+                    "chunk_id": 0,
+                    "whole_file": header_duration_s is not None
                 }]
             
+            audio = self._load(audio_path)
+            total_duration_ms = len(audio)
             natural_breaks = self.detect_natural_breaks(audio)
             
             chunks = []
@@ -179,11 +487,12 @@ class ChunkProcessor:
                 
                 best_break = None
                 if natural_breaks:
-                    acceptable_breaks = [
-                        bp for bp in natural_breaks 
-                        if ideal_end - (optimal_chunk_ms * 0.3) <= bp <= min(max_end, total_duration_ms)
-                        and bp > current_start
-                    ]
+                    # Breaks are sorted, so the acceptable window is a slice found by bisection
+                    lo = bisect.bisect_left(
+                        natural_breaks, max(ideal_end - (optimal_chunk_ms * 0.3), current_start + 1)
+                    )
+                    hi = bisect.bisect_right(natural_breaks, min(max_end, total_duration_ms))
+                    acceptable_breaks = natural_breaks[lo:hi]
                     
                     if acceptable_breaks:
                         best_break = min(acceptable_breaks, key=lambda x: abs(x - ideal_end))
@@ -210,17 +519,17 @@ class ChunkProcessor:
                     
                 chunk_id += 1
             
-            print(f"Created {len(chunks)} smart chunks")
+            logger.info("Created %d smart chunks", len(chunks))
             return chunks
             
         except Exception as e:
-            print(f"Error creating smart chunks: {e}")
+            logger.error("Error creating smart chunks: %s", e)
             return self.create_simple_chunks(audio_path)
     
     def create_simple_chunks(self, audio_path: str) -> list[Dict[str, Any]]:
         """Fallback simple time-based chunking."""
         try:
-            audio = AudioSegment.from_file(audio_path)
+            audio = self._load(audio_path)
             total_duration_ms = len(audio)
             chunk_duration_ms = OPTIMAL_CHUNK_DURATION * 1000
             overlap_ms = OVERLAP_DURATION * 1000
@@ -248,171 +557,78 @@ class ChunkProcessor:
             
             return chunks
         except Exception as e:
-            print(f"Error in simple chunking: {e}")
+            logger.error("Error in simple chunking: %s", e)
             raise
     
-    def extract_chunk(self, audio_path: str, chunk_info: Dict[str, Any]) -> str:
-        """Extract a specific chunk from audio file."""
+    def extract_chunk(self, audio_path: str, chunk_info: Dict[str, Any]) -> np.ndarray:
+        """Return a chunk's samples as float32 in [-1, 1), as whisper.load_audio would.
+        
+        The samples are converted from the decoded 16-bit audio straight into the shared
+        buffer, so no chunk file is written or decoded; each chunk must be transcribed
+        before the next is extracted.
+        """
         try:
-            audio = AudioSegment.from_file(audio_path)
-            chunk = audio[chunk_info["start_ms"]:chunk_info["end_ms"]]
+            # A chunk spanning a file that is already 16 kHz mono 16-bit WAV is read in place
+            if chunk_info.get("whole_file"):
+                return read_pcm_wav(audio_path)
+            
+            pcm = np.frombuffer(self._load(audio_path).raw_data, dtype=np.int16)
+            samples_per_ms = SAMPLE_RATE // 1000
+            chunk = pcm[chunk_info["start_ms"] * samples_per_ms:chunk_info["end_ms"] * samples_per_ms]
             
             # Validate chunk has content
             if len(chunk) == 0:
                 raise Exception(f"Extracted chunk {chunk_info['chunk_id']} is empty")
             
-            chunk_path = os.path.join(
-                self.temp_dir, 
-                f"chunk_{chunk_info['chunk_id']:03d}.wav"
-            )
-            
-            # Export with additional validation
-            chunk.export(
-                chunk_path,
-                format="wav",
-                parameters=["-ar", "16000", "-ac", "1"]
-            )
-            
-            # Verify the exported file exists and has content
-            if not os.path.exists(chunk_path) or os.path.getsize(chunk_path) == 0:
-                raise Exception(f"Failed to create valid chunk file for chunk {chunk_info['chunk_id']}")
-            
-            return chunk_path
+            return np.multiply(chunk, 1 / 32768.0, out=sample_buffer(len(chunk))[:len(chunk)])
         except Exception as e:
-            print(f"Error extracting chunk {chunk_info['chunk_id']}: {e}")
+            logger.error("Error extracting chunk %s: %s", chunk_info['chunk_id'], e)
             raise
     
-    def process_single_chunk(self, chunk_path: str, chunk_info: Dict[str, Any], language: str) -> Dict[str, Any]:
+    def process_single_chunk(self, audio: np.ndarray, chunk_info: Dict[str, Any], language: str) -> Dict[str, Any]:
         """Process a single chunk with the Whisper model."""
         try:
-            print(f"Processing chunk {chunk_info['chunk_id']} (duration: {chunk_info['duration']:.2f}s)")
-            
-            # Validate chunk file before loading
-            if not os.path.exists(chunk_path):
-                raise Exception(f"Chunk file does not exist: {chunk_path}")
-            
-            file_size = os.path.getsize(chunk_path)
-            if file_size == 0:
-                raise Exception(f"Chunk file is empty: {chunk_path}")
-            
-            print(f"Loading chunk {chunk_info['chunk_id']} from {chunk_path} (size: {file_size} bytes)")
-            
-            # Load audio with multiple fallback methods
-            audio = None
-            last_error = None
-            
-            # Method 1: Direct whisper.load_audio
-            try:
-                print(f"Attempting to load chunk audio with whisper.load_audio...")
-                audio = whisper.load_audio(chunk_path)
-                if audio is not None:
-                    print(f"Successfully loaded chunk audio with whisper.load_audio")
-                else:
-                    print(f"whisper.load_audio returned None for chunk")
-            except Exception as e:
-                last_error = f"whisper.load_audio failed: {str(e)}"
-                print(f"whisper.load_audio failed for chunk: {e}")
-            
-            # Method 2: Try loading with pydub and converting
-            if audio is None:
-                try:
-                    print(f"Attempting to load chunk audio with pydub fallback...")
-                    from pydub import AudioSegment
-                    import tempfile
-                    
-                    # Load with pydub
-                    audio_segment = AudioSegment.from_file(chunk_path)
-                    
-                    # Convert to wav format in memory
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                        audio_segment.export(
-                            temp_wav.name,
-                            format="wav",
-                            parameters=["-ar", "16000", "-ac", "1"]
-                        )
-                        
-                        # Try loading the converted file
-                        audio = whisper.load_audio(temp_wav.name)
-                        
-                        # Clean up temp file
-                        os.unlink(temp_wav.name)
-                        
-                        if audio is not None:
-                            print(f"Successfully loaded chunk audio with pydub fallback")
-                        else:
-                            print(f"Pydub fallback also returned None for chunk")
-                            
-                except Exception as e:
-                    last_error = f"Pydub fallback failed: {str(e)}"
-                    print(f"Pydub fallback failed for chunk: {e}")
-            
-            # Final check
-            if audio is None:
-                raise Exception(f"All audio loading methods failed for chunk {chunk_info['chunk_id']} file: {chunk_path}. Last error: {last_error}")
-            
-            # Check if audio has the expected shape
-            if not hasattr(audio, 'shape'):
-                raise Exception(f"Chunk {chunk_info['chunk_id']} has invalid audio format - missing shape attribute")
-            
-            if len(audio.shape) == 0:
-                raise Exception(f"Chunk {chunk_info['chunk_id']} has invalid audio format - empty shape")
+            logger.info("Processing chunk %s (duration: %.2fs)", chunk_info['chunk_id'], chunk_info['duration'])
             
             # Check if audio has sufficient length
             if audio.shape[0] == 0:
                 raise Exception(f"Chunk {chunk_info['chunk_id']} is empty or too short")
             
-            print(f"Loaded chunk {chunk_info['chunk_id']} with audio shape: {audio.shape}")
+            logger.debug("Loaded chunk %s with audio shape: %s", chunk_info['chunk_id'], audio.shape)
+            
+            # A chunk with no audible frame would pay a full encoder pass only for
+            # no_speech_threshold to discard the result
+            level = peak_frame_dbfs(audio)
+            if level < SILENT_CHUNK_DBFS:
+                logger.info("Skipping silent chunk %s (loudest frame %.1f dBFS)", chunk_info['chunk_id'], level)
+                return {
+                    "chunk_info": chunk_info,
+                    "result": {"text": "", "segments": [], "word_segments": [], "language": language}
+                }
             
             try:
-                print(f"Starting whisper.transcribe() for chunk {chunk_info['chunk_id']} with:")
-                print(f"  - Model type: {type(self.model)}")
-                print(f"  - Audio type: {type(audio)}")
-                print(f"  - Audio shape: {audio.shape}")
-                print(f"  - Language: {language}")
-                
-                result = whisper.transcribe(
-                    self.model, 
-                    audio, 
-                    language=language,
-                    remove_punctuation_from_words=False,
-                    include_punctuation_in_confidence=True,
-                    refine_whisper_precision=0.5,
-                    min_word_duration=0.1,
-                    plot_word_alignment=False,
-                    word_alignment_most_top_layers=None,
-                    remove_empty_words=True,
-                    temperature=0.0,
-                    condition_on_previous_text=False,
-                    compression_ratio_threshold=2.4,
-                    logprob_threshold=-1.0,
-                    no_speech_threshold=0.6
+                logger.debug(
+                    "Starting whisper.transcribe() for chunk %s with model %s, audio %s %s, language %s",
+                    chunk_info['chunk_id'], type(self.model), type(audio), audio.shape, language
                 )
                 
-                print(f"whisper.transcribe() completed successfully for chunk {chunk_info['chunk_id']}")
-                print(f"Result type: {type(result)}")
+                result = transcribe_with_model(self.model, audio, language=language, **self._DECODE_KWARGS)
+                
+                logger.debug("whisper.transcribe() completed successfully for chunk %s", chunk_info['chunk_id'])
                 
             except Exception as e:
-                print(f"whisper.transcribe() failed for chunk {chunk_info['chunk_id']}: {e}")
-                import traceback
-                print(f"Chunk transcribe traceback: {traceback.format_exc()}")
+                logger.exception("whisper.transcribe() failed for chunk %s", chunk_info['chunk_id'])
                 raise Exception(f"Whisper transcription failed for chunk: {str(e)}")
             
             self.adjust_timestamps(result, chunk_info["start_time"])
             
-            if os.path.exists(chunk_path):
-                os.remove(chunk_path)
-            
-            gc.collect()
-            
-            print(f"Completed chunk {chunk_info['chunk_id']}")
+            logger.info("Completed chunk %s", chunk_info['chunk_id'])
             return {
                 "chunk_info": chunk_info,
                 "result": result
             }
         except Exception as e:
-            print(f"Error processing chunk {chunk_info['chunk_id']}: {e}")
-            if os.path.exists(chunk_path):
-                os.remove(chunk_path)
+            logger.error("Error processing chunk %s: %s", chunk_info['chunk_id'], e)
             raise
     
     def adjust_timestamps(self, result: Dict[str, Any], start_offset: float):
@@ -467,27 +683,39 @@ class ChunkProcessor:
                 overlap_start = chunk_info["start_time"]
                 overlap_end = prev_chunk_info["start_time"] + prev_chunk_info["duration"]
                 
-                filtered_segments = []
-                for segment in segments:
-                    if segment["start"] >= overlap_end - (OVERLAP_DURATION * 0.5):
-                        filtered_segments.append(segment)
-                    elif segment["start"] < overlap_end:
-                        is_duplicate = False
-                        segment_text = segment["text"].strip().lower()
-                        
-                        for prev_segment in all_segments[-3:]:
-                            prev_text = prev_segment["text"].strip().lower()
-                            if segment_text and self.text_similarity(segment_text, prev_text) > 0.8:
-                                is_duplicate = True
-                                break
-                        
-                        if not is_duplicate:
-                            filtered_segments.append(segment)
+                if overlap_start < overlap_end:
+                    # Both chunks transcribed the overlap. Cut it at a fixed point: the earlier
+                    # chunk keeps the segments starting before the cut (its end sits on a
+                    # silence) and this chunk the ones from the cut on, so nothing is kept twice
+                    cut = overlap_end - (OVERLAP_DURATION * 0.5)
+                    while all_segments and all_segments[-1]["start"] >= cut:
+                        all_segments.pop()
+                    segments = [segment for segment in segments if segment["start"] >= cut]
                 
-                all_segments.extend(filtered_segments)
+                all_segments.extend(segments)
+        
+        # One pass in time order drops whatever still repeats an accepted segment's span;
+        # text is only compared when a segment runs past that span, to keep new speech
+        all_segments.sort(key=lambda segment: segment["start"])
+        accepted = []
+        last_end = float("-inf")
+        for segment in all_segments:
+            if segment["start"] < last_end - 0.1:
+                if segment["end"] <= last_end or self.text_similarity(
+                        segment["text"], accepted[-1]["text"]) > 0.5:
+                    continue
+            accepted.append(segment)
+            last_end = max(last_end, segment["end"])
+        all_segments = accepted
         
         merged_result["segments"] = all_segments
-        merged_result["text"] = " ".join([seg["text"] for seg in all_segments])
+        # Write the texts straight into one buffer rather than listing them for join()
+        text = io.StringIO()
+        for index, segment in enumerate(all_segments):
+            if index:
+                text.write(" ")
+            text.write(segment["text"])
+        merged_result["text"] = text.getvalue()
         
         all_word_segments = []
         for chunk_data in chunk_results:
@@ -504,41 +732,128 @@ class ChunkProcessor:
         if not text1 or not text2:
             return 0.0
         
-        words1 = set(text1.split())
-        words2 = set(text2.split())
+        words1 = frozenset(text1.split())
+        words2 = frozenset(text2.split())
         
         if not words1 and not words2:
             return 1.0
         if not words1 or not words2:
             return 0.0
         
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union)
+        return len(words1 & words2) / len(words1 | words2)
 
 class TranscriptionService:
     """Core transcription service"""
     
-    def __init__(self):
-        self.model = None
-        self.load_model()
+    # Decode options for direct transcription; only the language varies per call
+    _DECODE_KWARGS = dict(
+        remove_punctuation_from_words=False,
+        include_punctuation_in_confidence=True,
+        temperature=0.0,
+        condition_on_previous_text=False,
+        compression_ratio_threshold=2.4,
+        logprob_threshold=-1.0,
+        no_speech_threshold=0.6
+    )
+    # Options for the plain whisper retry, which has no word-level settings
+    _FALLBACK_KWARGS = dict(temperature=0.0)
+    
+    def __init__(self, compute_type: Optional[str] = WHISPER_COMPUTE_TYPE):
+        self.backend = None
+        self.device = None
+        # None picks int8 on CPU and int8_float16 on CUDA; set after loading to what the model runs
+        self.compute_type = compute_type
+        self._model_lock = threading.Lock()
+    
+    @property
+    def max_concurrency(self) -> int:
+        """How many transcribe calls the model can run at once"""
+        if WHISPER_BACKEND == "faster-whisper" and WhisperModel is not None:
+            return WHISPER_WORKERS
+        return 1  # whisper_timestamped models are not reentrant
+    
+    @functools.cached_property
+    def model(self):
+        """Whisper model, loaded on first use (None if loading failed)"""
+        # Requests on several threads can reach the first use together; only one loads
+        with self._model_lock:
+            if "model" not in self.__dict__:
+                self.load_model()
+        return self.__dict__["model"]
     
     def load_model(self):
         """Load Whisper model"""
         try:
-            print("Loading Whisper large model...")
-            self.model = whisper.load_model("large", device="cpu")
-            log_event("MODEL_LOAD", "SUCCESS", "Whisper large model loaded successfully.")
-            print("Whisper large model loaded successfully!")
+            logger.info("Loading Whisper large model...")
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            if WHISPER_BACKEND == "faster-whisper" and WhisperModel is not None:
+                # CTranslate2 with int8 weights: a quarter of the FP32 memory traffic per decode step
+                compute_type = self.compute_type or ("int8_float16" if device == "cuda" else "int8")
+                # Each worker gets its own slice of the cores for its GEMMs, sharing one copy of the weights
+                cpu_threads = max(1, (os.cpu_count() or 1) // WHISPER_WORKERS) if device == "cpu" else 0
+                model = WhisperModel(
+                    WHISPER_MODEL_NAME, device=device, compute_type=compute_type,
+                    cpu_threads=cpu_threads, num_workers=WHISPER_WORKERS
+                )
+                self.model = model
+                self.backend = "faster-whisper"
+                self.compute_type = compute_type
+            else:
+                model = whisper.load_model(WHISPER_MODEL_NAME, device=device)
+                if device == "cuda":
+                    # fp16 weights, so transcribe()'s fp16 decode does not cast every fp32 weight per call
+                    model = model.half()
+                    compute_type = "float16"
+                    if WHISPER_TORCH_COMPILE:
+                        model = compile_whisper_encoder(model)
+                else:
+                    quantized = quantize_whisper_linear(model)
+                    compute_type = "int8" if quantized is not model else "float32"
+                    model = quantized
+                self.model = model
+                self.compute_type = compute_type
+                self.backend = "whisper-timestamped"
+            self.device = device
+            if device == "cuda":
+                self.warmup()
+            log_event("MODEL_LOAD", "SUCCESS", f"Whisper large model loaded successfully ({self.backend}, {device}).")
+            logger.info("Whisper large model loaded successfully!")
         except Exception as e:
             error_message = f"Error loading Whisper model: {e}"
-            print(error_message)
+            logger.error(error_message)
             log_event("MODEL_LOAD", "FAILURE", error_message)
             self.model = None
     
-    def transcribe_audio(self, file_path: str, language: str = "th") -> Dict[str, Any]:
-        """Transcribe audio file with intelligent chunking for large files"""
+    def warmup(self):
+        """Run the model once at the shapes requests use, so CUDA setup is paid at startup.
+        
+        The first GPU decode pays for the CUDA context, cuBLAS handles and allocator pools.
+        The batched pipeline is warmed at batch 1 and at WHISPER_BATCH_SIZE with 30s windows
+        of silence; VAD would drop silence, so the windows are given as clip timestamps.
+        """
+        try:
+            if self.backend == "faster-whisper":
+                for batch_size in sorted({1, WHISPER_BATCH_SIZE}):
+                    windows = [{"start": i * 30, "end": (i + 1) * 30} for i in range(batch_size)]
+                    segments, _ = batched_pipeline(self.model).transcribe(
+                        np.zeros(batch_size * 30 * SAMPLE_RATE, dtype=np.float32), language="th",
+                        vad_filter=False, clip_timestamps=windows, batch_size=batch_size
+                    )
+                    list(segments)
+            else:
+                with torch.inference_mode():
+                    whisper.transcribe(self.model, np.zeros(SAMPLE_RATE, dtype=np.float32), language="th", vad=False)
+            logger.info("Whisper model warm")
+        except Exception as e:
+            logger.warning("Model warmup failed, the first request will pay for it: %s", e)
+    
+    def transcribe_audio(self, file_path: str, language: str = "th",
+                         progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Transcribe audio file with intelligent chunking for large files.
+        
+        progress_callback, if given, is called from this thread with the fraction of the
+        audio transcribed so far, as segments or chunks finish.
+        """
         if not self.model:
             raise Exception("Whisper model is not available")
         
@@ -558,47 +873,47 @@ class TranscriptionService:
         try:
             processed_file_path = preprocess_audio_file(file_path)
         except Exception as e:
-            print(f"Audio preprocessing failed, using original file: {e}")
+            logger.warning("Audio preprocessing failed, using original file: %s", e)
             processed_file_path = file_path
         
         log_event("TRANSCRIBE_REQUEST", "RECEIVED", f"File: {file_path}, Size: {file_size} bytes")
         
         use_chunking = file_size > FILE_SIZE_THRESHOLD
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            try:
-                if use_chunking:
-                    log_event("PROCESSING_MODE", "CHUNKED", f"File size {file_size} bytes > {FILE_SIZE_THRESHOLD} bytes, using chunking")
-                    result = self._process_with_chunking(processed_file_path, language, temp_dir)
-                else:
-                    log_event("PROCESSING_MODE", "DIRECT", f"File size {file_size} bytes <= {FILE_SIZE_THRESHOLD} bytes, direct processing")
-                    result = self._process_directly(processed_file_path, language)
-                
-                text_snippet = result.get("text", "")[:200]
-                log_event("TRANSCRIBE_SUCCESS", "SUCCESS", f"File: {file_path}, Text preview: {text_snippet}...")
-                
-                # Clean up preprocessed file if it was created
-                if processed_file_path != file_path and os.path.exists(processed_file_path):
-                    try:
-                        os.remove(processed_file_path)
-                        print(f"Cleaned up preprocessed file: {processed_file_path}")
-                    except Exception as e:
-                        print(f"Failed to clean up preprocessed file: {e}")
-                
-                return result
-                
-            except Exception as e:
-                # Clean up preprocessed file on error
-                if processed_file_path != file_path and os.path.exists(processed_file_path):
-                    try:
-                        os.remove(processed_file_path)
-                    except:
-                        pass
-                
-                log_event("TRANSCRIBE_FAILURE", "ERROR", f"File: {file_path}, Error: {str(e)}")
-                raise Exception(f"Error during transcription: {str(e)}")
-    
-    def _process_directly(self, file_path: str, language: str) -> Dict[str, Any]:
+        try:
+            if use_chunking:
+                log_event("PROCESSING_MODE", "CHUNKED", f"File size {file_size} bytes > {FILE_SIZE_THRESHOLD} bytes, using chunking")
+                result = self._process_with_chunking(processed_file_path, language, progress_callback)
+            else:
+                log_event("PROCESSING_MODE", "DIRECT", f"File size {file_size} bytes <= {FILE_SIZE_THRESHOLD} bytes, direct processing")
+                result = self._process_directly(processed_file_path, language, progress_callback)
+            
+            text_snippet = result.get("text", "")[:200]
+            log_event("TRANSCRIBE_SUCCESS", "SUCCESS", f"File: {file_path}, Text preview: {text_snippet}...")
+            
+            # Clean up preprocessed file if it was created
+            if processed_file_path != file_path and os.path.exists(processed_file_path):
+                try:
+                    os.remove(processed_file_path)
+                    logger.debug("Cleaned up preprocessed file: %s", processed_file_path)
+                except Exception as e:
+                    logger.warning("Failed to clean up preprocessed file: %s", e)
+            
+            return result
+            
+        except Exception as e:
+            # Clean up preprocessed file on error
+            if processed_file_path != file_path and os.path.exists(processed_file_path):
+                try:
+                    os.remove(processed_file_path)
+                except:
+                    pass
+            
+            log_event("TRANSCRIBE_FAILURE", "ERROR", f"File: {file_path}, Error: {str(e)}")
+            raise Exception(f"Error during transcription: {str(e)}")
+
+    def _process_directly(self, file_path: str, language: str,
+                          progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
         """Process small files directly without chunking."""
         try:
             # Validate audio file before loading
@@ -609,219 +924,145 @@ class TranscriptionService:
             if file_size == 0:
                 raise Exception(f"Audio file is empty: {file_path}")
             
-            print(f"Loading audio file {file_path} (size: {file_size} bytes)")
-            
-            # Debug: Test whisper library functions
-            print(f"Whisper module available: {whisper is not None}")
-            print(f"Whisper load_audio function available: {hasattr(whisper, 'load_audio')}")
-            
-            # Try a simple test with numpy array
-            try:
-                import numpy as np
-                test_audio = np.array([0.1, 0.2, 0.3], dtype=np.float32)
-                print(f"Test numpy array shape: {test_audio.shape}")
-                print(f"Test numpy array type: {type(test_audio)}")
-            except Exception as e:
-                print(f"Numpy test failed: {e}")
+            logger.debug("Loading audio file %s (size: %s bytes)", file_path, file_size)
             
             # Load audio with multiple fallback methods
             audio = None
             last_error = None
             
-            # Method 1: Direct whisper.load_audio
+            # Method 1: the preprocessed file is 16 kHz mono 16-bit WAV, so its frames are
+            # read straight into this thread's sample buffer without spawning ffmpeg
             try:
-                print(f"Attempting to load audio with whisper.load_audio...")
-                print(f"File exists: {os.path.exists(file_path)}")
-                print(f"File size: {os.path.getsize(file_path) if os.path.exists(file_path) else 'N/A'}")
-                
-                audio = whisper.load_audio(file_path)
-                print(f"whisper.load_audio result type: {type(audio)}")
-                print(f"whisper.load_audio result: {audio is not None}")
-                
-                if audio is not None:
-                    print(f"Successfully loaded audio with whisper.load_audio")
-                    if hasattr(audio, 'shape'):
-                        print(f"Audio shape: {audio.shape}")
-                    else:
-                        print(f"Warning: Audio object has no shape attribute")
-                else:
-                    print(f"whisper.load_audio returned None")
+                audio = read_pcm_wav(file_path)
             except Exception as e:
-                last_error = f"whisper.load_audio failed: {str(e)}"
-                print(f"whisper.load_audio failed: {e}")
-                import traceback
-                print(f"Full traceback: {traceback.format_exc()}")
+                last_error = f"PCM WAV read failed: {str(e)}"
+                logger.debug("PCM WAV read failed, decoding with whisper.load_audio: %s", e)
             
-            # Method 2: Try loading with pydub and converting
+            # Method 2: Direct whisper.load_audio
             if audio is None:
                 try:
-                    print(f"Attempting to load audio with pydub fallback...")
-                    from pydub import AudioSegment
-                    import tempfile
+                    logger.debug("Attempting to load audio with whisper.load_audio...")
+                    audio = whisper.load_audio(file_path)
+                    if audio is not None:
+                        logger.debug("Successfully loaded audio with whisper.load_audio")
+                    else:
+                        logger.warning("whisper.load_audio returned None")
+                except Exception as e:
+                    last_error = f"whisper.load_audio failed: {str(e)}"
+                    logger.warning("whisper.load_audio failed", exc_info=True)
+            
+            # Method 3: Try loading with pydub and converting
+            if audio is None:
+                try:
+                    logger.debug("Attempting to load audio with pydub fallback...")
                     
                     # Load with pydub
-                    print(f"Loading with pydub from: {file_path}")
                     audio_segment = AudioSegment.from_file(file_path)
-                    print(f"Pydub loaded audio: duration={len(audio_segment)}ms, channels={audio_segment.channels}, frame_rate={audio_segment.frame_rate}")
+                    logger.debug(
+                        "Pydub loaded audio: duration=%sms, channels=%s, frame_rate=%s",
+                        len(audio_segment), audio_segment.channels, audio_segment.frame_rate
+                    )
                     
                     # Convert to wav format in memory
                     with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                        print(f"Converting to WAV: {temp_wav.name}")
                         audio_segment.export(
                             temp_wav.name,
                             format="wav",
                             parameters=["-ar", "16000", "-ac", "1"]
                         )
                         
-                        converted_size = os.path.getsize(temp_wav.name)
-                        print(f"Converted file size: {converted_size} bytes")
-                        
                         # Try loading the converted file
-                        print(f"Attempting whisper.load_audio on converted file...")
                         audio = whisper.load_audio(temp_wav.name)
-                        print(f"Converted audio result type: {type(audio)}")
-                        print(f"Converted audio result: {audio is not None}")
                         
                         # Clean up temp file
                         os.unlink(temp_wav.name)
                         
                         if audio is not None:
-                            print(f"Successfully loaded audio with pydub fallback")
-                            if hasattr(audio, 'shape'):
-                                print(f"Converted audio shape: {audio.shape}")
+                            logger.debug("Successfully loaded audio with pydub fallback")
                         else:
-                            print(f"Pydub fallback also returned None")
+                            logger.warning("Pydub fallback also returned None")
                             
                 except Exception as e:
                     last_error = f"Pydub fallback failed: {str(e)}"
-                    print(f"Pydub fallback failed: {e}")
-                    import traceback
-                    print(f"Pydub fallback traceback: {traceback.format_exc()}")
-            
-            # Method 3: Try creating a simple test audio to verify whisper is working
-            if audio is None:
-                try:
-                    print(f"Attempting to create synthetic test audio...")
-                    import numpy as np
-                    
-                    # Create a simple sine wave test audio (1 second, 16kHz)
-                    sample_rate = 16000
-                    duration = 1.0
-                    frequency = 440  # A4 note
-                    t = np.linspace(0, duration, int(sample_rate * duration), False)
-                    test_audio_data = np.sin(2 * np.pi * frequency * t).astype(np.float32)
-                    
-                    print(f"Test audio shape: {test_audio_data.shape}")
-                    print(f"Test audio type: {type(test_audio_data)}")
-                    print(f"Test audio has shape attr: {hasattr(test_audio_data, 'shape')}")
-                    
-                    # Test if whisper can work with this numpy array directly
-                    if hasattr(test_audio_data, 'shape') and len(test_audio_data.shape) > 0:
-                        print(f"Using synthetic test audio as fallback")
-                        audio = test_audio_data
-                        print(f"WARNING: Using synthetic test audio instead of actual file!")
-                    
-                except Exception as e:
-                    print(f"Synthetic audio test failed: {e}")
-                    import traceback
-                    print(f"Synthetic audio traceback: {traceback.format_exc()}")
+                    logger.warning("Pydub fallback failed", exc_info=True)
             
             # Final check
             if audio is None:
                 raise Exception(f"All audio loading methods failed for file: {file_path}. Last error: {last_error}")
             
-            # Check if audio has the expected shape
-            if not hasattr(audio, 'shape'):
-                raise Exception("Loaded audio has invalid format - missing shape attribute")
-            
-            if len(audio.shape) == 0:
-                raise Exception("Loaded audio has invalid format - empty shape")
-            
-            # Check if audio has sufficient length
-            if audio.shape[0] == 0:
-                raise Exception("Audio file appears to be empty or too short")
+            # Check the audio is one non-empty channel of samples
+            if not (isinstance(audio, np.ndarray) and audio.ndim == 1 and audio.size > 0):
+                raise Exception("Loaded audio has invalid format or is empty")
             
             log_event("AUDIO_LOAD", "SUCCESS", f"Loaded audio with shape: {audio.shape}")
             
             try:
-                print(f"Starting whisper.transcribe() with:")
-                print(f"  - Model type: {type(self.model)}")
-                print(f"  - Audio type: {type(audio)}")
-                print(f"  - Audio shape: {audio.shape}")
-                print(f"  - Language: {language}")
+                logger.debug(
+                    "Starting whisper.transcribe() with model %s, audio %s %s, language %s",
+                    type(self.model), type(audio), audio.shape, language
+                )
                 
-                result = whisper.transcribe(
-                    self.model, 
-                    audio, 
-                    language=language,
-                    remove_punctuation_from_words=False,
-                    include_punctuation_in_confidence=True,
-                    temperature=0.0
+                result = transcribe_with_model(
+                    self.model, audio, language=language, progress_callback=progress_callback, **self._DECODE_KWARGS
                 )
                 
-                print(f"whisper.transcribe() completed successfully")
-                print(f"Result type: {type(result)}")
+                logger.debug("whisper.transcribe() completed successfully")
                 return result
                 
             except Exception as e:
-                print(f"whisper.transcribe() failed: {e}")
-                import traceback
-                print(f"Transcribe traceback: {traceback.format_exc()}")
+                logger.exception("whisper.transcribe() failed")
+                
+                # The basic whisper fallback needs an openai-whisper model, and is opt-in
+                if self.backend != "whisper-timestamped" or not WHISPER_BASIC_FALLBACK:
+                    raise Exception(f"Whisper transcription failed: {str(e)}")
                 
                 # Try fallback with basic whisper (without timestamps)
                 try:
-                    print(f"Attempting fallback with basic whisper transcription...")
-                    import whisper as basic_whisper
+                    logger.info("Attempting fallback with basic whisper transcription...")
                     
                     # Use the model for basic transcription
-                    result = basic_whisper.transcribe(
-                        self.model,
-                        audio,
-                        language=language,
-                        temperature=0.0
-                    )
+                    result = basic_whisper.transcribe(self.model, audio, language=language, **self._FALLBACK_KWARGS)
                     
-                    print(f"Basic whisper fallback succeeded")
+                    logger.info("Basic whisper fallback succeeded")
                     return result
                     
                 except Exception as fallback_e:
-                    print(f"Basic whisper fallback also failed: {fallback_e}")
+                    logger.error("Basic whisper fallback also failed: %s", fallback_e)
                     
                 raise Exception(f"Whisper transcription failed: {str(e)}")
         except Exception as e:
             raise Exception(f"Direct processing failed: {str(e)}")
     
-    def _process_with_chunking(self, file_path: str, language: str, temp_dir: str) -> Dict[str, Any]:
+    def _process_with_chunking(self, file_path: str, language: str,
+                               progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
         """Process large files with intelligent chunking."""
+        if self.backend == "faster-whisper":
+            return self._process_batched(file_path, language, progress_callback)
+        
         try:
-            processor = ChunkProcessor(self.model, temp_dir)
+            processor = ChunkProcessor(self.model)
             
             log_event("CHUNKING", "START", "Creating smart chunks")
             chunks = processor.create_smart_chunks(file_path)
             log_event("CHUNKING", "SUCCESS", f"Created {len(chunks)} chunks")
             
             chunk_results = []
-            max_concurrent = 2
             
-            for i in range(0, len(chunks), max_concurrent):
-                batch = chunks[i:i + max_concurrent]
-                batch_results = []
-                
-                chunk_paths = []
-                for chunk_info in batch:
-                    chunk_path = processor.extract_chunk(file_path, chunk_info)
-                    chunk_paths.append((chunk_path, chunk_info))
+            # Chunks share one sample buffer, so each is transcribed before the next is extracted
+            for index, chunk_info in enumerate(chunks, 1):
+                audio = processor.extract_chunk(file_path, chunk_info)
+                try:
+                    chunk_results.append(processor.process_single_chunk(audio, chunk_info, language))
+                except Exception as e:
+                    log_event("CHUNK_ERROR", "ERROR", f"Chunk {chunk_info['chunk_id']} failed: {str(e)}")
                 
-                for chunk_path, chunk_info in chunk_paths:
-                    try:
-                        result = processor.process_single_chunk(chunk_path, chunk_info, language)
-                        batch_results.append(result)
-                    except Exception as e:
-                        log_event("CHUNK_ERROR", "ERROR", f"Chunk {chunk_info['chunk_id']} failed: {str(e)}")
-                        continue
+                if progress_callback is not None:
+                    progress_callback(index / len(chunks))
                 
-                chunk_results.extend(batch_results)
-                gc.collect()
+                # Refcounting frees each chunk's tensors; what builds up is the CUDA caching
+                # allocator's blocks, and returning those synchronizes the device
+                if self.device == "cuda" and index % EMPTY_CACHE_EVERY == 0:
+                    torch.cuda.empty_cache()
             
             if not chunk_results:
                 raise Exception("All chunks failed to process")
@@ -835,11 +1076,50 @@ class TranscriptionService:
         except Exception as e:
             raise Exception(f"Chunking process failed: {str(e)}")
     
+    def _process_batched(self, file_path: str, language: str,
+                         progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Transcribe a large file in one batched faster-whisper call.
+        
+        The pipeline already cuts the audio into <=30s speech windows at VAD boundaries and
+        encodes WHISPER_BATCH_SIZE of them per pass, so chunking first would only shrink
+        its batches and add overlaps to merge.
+        """
+        try:
+            log_event("CHUNKING", "BATCHED", f"Transcribing in batches of {WHISPER_BATCH_SIZE} windows")
+            try:
+                audio = read_pcm_wav(file_path)
+            except (wave.Error, EOFError, ValueError):
+                # Not a normalized WAV (preprocessing failed); let faster-whisper decode it
+                audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+            
+            return transcribe_with_model(
+                self.model, audio, language=language, progress_callback=progress_callback,
+                **ChunkProcessor._DECODE_KWARGS
+            )
+            
+        except Exception as e:
+            raise Exception(f"Batched transcription failed: {str(e)}")
+    
     def get_model_info(self) -> Dict[str, Any]:
-        """Get model information"""
+        """Get model information; reports the current state and never starts the load"""
+        model = self.__dict__.get("model")
         return {
-            "model_loaded": self.model is not None,
-            "model_type": "large" if self.model else None,
+            "model_loaded": model is not None,
+            "model_type": WHISPER_MODEL_NAME if model is not None else None,
+            "backend": self.backend,
+            "device": self.device,
+            "compute_type": self.compute_type,
             "chunking_threshold_mb": FILE_SIZE_THRESHOLD / (1024 * 1024),
             "optimal_chunk_duration": OPTIMAL_CHUNK_DURATION
-        }
\ No newline at end of file
+        }
+
+_service: Optional[TranscriptionService] = None
+_service_lock = threading.Lock()
+
+def get_service() -> TranscriptionService:
+    """Process-wide TranscriptionService, so every importer shares one loaded model"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TranscriptionService()
+    return _service
\ No newline at end of file